@@ -0,0 +1,106 @@
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+if sys.platform.startswith('linux') and not os.environ.get('DISPLAY'):
+    # 无桌面环境：pynput 使用 dummy 后端，Qt 使用 offscreen 平台
+    os.environ.setdefault('PYNPUT_BACKEND', 'dummy')
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+from PyQt5.QtWidgets import QApplication
+from PyQt5.QtCore import QTimer
+from core.keyboard_listener import KeyboardListener
+from core.data_processor import DataProcessor
+from core.input_sources import ReplayInputSource, synthetic_events
+from core.style_manager import StyleManager
+from ui.floating_window import FloatingWindow
+
+SAMPLE_TEXT = "the quick brown fox jumps over the lazy dog "
+
+
+class ReplayBenchmark:
+    # 用回放输入源驱动 监听 -> 统计 -> 悬浮窗 整条链路，测量端到端吞吐
+    def __init__(self, source, data_dir):
+        self.app = QApplication(sys.argv)
+        self.source = source
+        self.style_manager = StyleManager()
+        self.keyboard_listener = KeyboardListener(input_source=source)
+        if not source.speed:
+            # 最大速度回放没有真实的按键间隔，让回放等待缓冲区腾出空间，测量处理吞吐而不是溢出
+            source.backpressure = self.keyboard_listener.event_buffer
+        self.data_processor = DataProcessor(data_dir)
+        self.floating_window = FloatingWindow(self.style_manager)
+        self.keys_processed = 0
+        self.start_time = 0
+        self.elapsed = 0
+
+        self.keyboard_listener.key_event.connect(self.floating_window.update_content)
+        self.keyboard_listener.clear_event.connect(self.floating_window.clear_content)
+        self.keyboard_listener.keys_for_stats.connect(self.on_keys_for_stats)
+
+        self.poll_timer = QTimer()
+        self.poll_timer.timeout.connect(self.check_finished)
+
+    def on_keys_for_stats(self, batch, releases):
+        self.data_processor.process_keys(batch, releases)
+        self.keys_processed += len(batch)
+
+    def run(self):
+        self.start_time = time.perf_counter()
+        self.keyboard_listener.start()
+        self.poll_timer.start(10)
+        self.app.exec_()
+        return self.report()
+
+    def check_finished(self):
+        if self.source.finished.is_set() and not len(self.keyboard_listener.event_buffer):
+            self.poll_timer.stop()
+            self.keyboard_listener.stop()
+            self.data_processor.close()
+            self.elapsed = time.perf_counter() - self.start_time
+            self.app.quit()
+
+    def report(self):
+        buffer_stats = self.keyboard_listener.get_buffer_stats()
+        keys_per_second = self.keys_processed / self.elapsed if self.elapsed else 0
+        print(f"处理按键: {self.keys_processed}")
+        print(f"耗时: {self.elapsed:.3f} s")
+        print(f"缓冲区: 丢弃 {buffer_stats['dropped']}，峰值占用 {buffer_stats['high_water']}/{buffer_stats['capacity']}")
+        if buffer_stats['dropped']:
+            # 丢弃了事件时吞吐只反映缓冲区溢出，不报告
+            print("吞吐: 无效（缓冲区丢弃了事件，请调大 event_buffer_size 或降低回放倍速）")
+            return None
+        print(f"吞吐: {keys_per_second:.0f} keys/s")
+        return keys_per_second
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Keymira 回放基准测试")
+    parser.add_argument('events', nargs='?', help="JSON lines 事件文件，省略时使用合成事件")
+    parser.add_argument('--speed', default='max', help="max（不等待）、realtime 或回放倍速")
+    parser.add_argument('--count', type=int, default=10000, help="合成事件的按键数")
+    args = parser.parse_args()
+
+    if args.speed == 'max':
+        speed = 0
+    elif args.speed == 'realtime':
+        speed = 1.0
+    else:
+        speed = float(args.speed)
+
+    if args.events:
+        source = ReplayInputSource.from_file(args.events, speed)
+    else:
+        text = (SAMPLE_TEXT * (args.count // len(SAMPLE_TEXT) + 1))[:args.count]
+        source = ReplayInputSource(synthetic_events(text), speed)
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        keys_per_second = ReplayBenchmark(source, data_dir).run()
+    if keys_per_second is None:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
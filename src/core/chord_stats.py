@@ -0,0 +1,70 @@
+from .key_counter import VOCABULARY
+
+# 修饰键位掩码，组合键 id = key_id << MODIFIER_SHIFT | 修饰键掩码
+MODIFIER_BITS = {'alt': 1, 'ctrl': 2, 'fn': 4, 'shift': 8, 'win': 16}
+MODIFIER_SHIFT = 5
+MODIFIER_MASK = (1 << MODIFIER_SHIFT) - 1
+
+# 每个掩码对应的修饰键前缀，按名称排序，与原先 "+".join(sorted(...)) 的结果一致
+MODIFIER_PREFIXES = [
+    "+".join(name for name, bit in sorted(MODIFIER_BITS.items()) if mask & bit)
+    for mask in range(1 << MODIFIER_SHIFT)
+]
+
+
+def chord_id(mask, key_id):
+    return key_id << MODIFIER_SHIFT | mask
+
+
+def parse_chord(keys):
+    # 旧接口的 'ctrl+shift+s' 拆分结果 -> (修饰键掩码, 主键)；没有主键时返回 None
+    mask = 0
+    for k in keys[:-1]:
+        bit = MODIFIER_BITS.get(k)
+        if bit is None:
+            return None
+        mask |= bit
+    if not mask or keys[-1] in MODIFIER_BITS:
+        return None
+    return mask, keys[-1]
+
+
+class ChordCounter:
+    # 组合键计数，与逐键计数分开；字符串只在查询时生成并缓存
+    def __init__(self):
+        self.counts = {}
+        self.names = {}
+
+    def add(self, mask, key_id, n=1):
+        chord = key_id << MODIFIER_SHIFT | mask
+        self.counts[chord] = self.counts.get(chord, 0) + n
+
+    def format(self, chord):
+        name = self.names.get(chord)
+        if name is None:
+            name = MODIFIER_PREFIXES[chord & MODIFIER_MASK] + "+" + VOCABULARY.names[chord >> MODIFIER_SHIFT]
+            self.names[chord] = name
+        return name
+
+    def top(self, n=20):
+        chords = sorted(self.counts.items(), key=lambda item: item[1], reverse=True)[:n]
+        return [(self.format(chord), count) for chord, count in chords]
+
+    def items(self):
+        return ((self.format(chord), count) for chord, count in self.counts.items())
+
+    def total(self):
+        return sum(self.counts.values())
+
+    def to_list(self):
+        # 持久化为 [掩码, 按键名, 次数]，掩码位定义固定，按键 id 每次运行重新映射
+        names = VOCABULARY.names
+        return [[chord & MODIFIER_MASK, names[chord >> MODIFIER_SHIFT], count]
+                for chord, count in self.counts.items()]
+
+    @classmethod
+    def from_list(cls, entries):
+        chords = cls()
+        for mask, key, count in entries or []:
+            chords.add(mask, VOCABULARY.intern(key), count)
+        return chords
@@ -1,115 +1,625 @@
+import copy
+import heapq
 import json
 import os
 from pathlib import Path
 import shutil
+import struct
+import threading
+import time
+from .key_counter import VOCABULARY, KeyCounter, MmapKeyCounter
+from .sqlite_store import SQLiteKeyStore
+from .rollup import RetentionPolicy
+from .transition_stats import TransitionStats
+from .chord_stats import ChordCounter, parse_chord
+from .range_index import DailyRangeIndex
+from .typing_stats import TypingDynamics
+
+# 日志记录: 序号, 时间戳, 按键名（UTF-8，补零到 23 字节）, 组合键修饰键掩码（0 表示不是组合键的主键）。
+# 掩码占用旧格式按键名字段的最后一个字节，旧日志里该字节为 0，可以直接按新格式读取
+JOURNAL_RECORD = struct.Struct('<Qd23sB')
+
+
+class KeyJournal:
+    def __init__(self, data_dir):
+        self.data_dir = data_dir
+        self.files = {}
+        self.sizes = {}
+        self.last_seq = {}
+        self.lock = threading.Lock()
+
+    def journal_path(self, username):
+        return os.path.join(self.data_dir, f"{username}_journal.log")
+
+    def replay(self, username, checkpoint_seq):
+        path = self.journal_path(username)
+        keys = []
+        last_seq = checkpoint_seq
+        size = 0
+        if os.path.exists(path):
+            with open(path, 'rb') as f:
+                data = f.read()
+            size = len(data) - len(data) % JOURNAL_RECORD.size
+            for seq, timestamp, raw_key, mask in JOURNAL_RECORD.iter_unpack(data[:size]):
+                if seq > checkpoint_seq:
+                    keys.append((timestamp, raw_key.rstrip(b'\0').decode('utf-8', 'ignore'), mask))
+                    last_seq = max(last_seq, seq)
+            if size != len(data):
+                # 丢弃崩溃时写了一半的记录
+                with open(path, 'r+b') as f:
+                    f.truncate(size)
+        with self.lock:
+            self.last_seq[username] = last_seq
+            self.sizes[username] = size
+        return keys
+
+    def append(self, username, key, timestamp, mask=0):
+        with self.lock:
+            f = self.files.get(username)
+            if f is None:
+                os.makedirs(self.data_dir, exist_ok=True)
+                f = self.files[username] = open(self.journal_path(username), 'ab')
+            seq = self.last_seq.get(username, 0) + 1
+            self.last_seq[username] = seq
+            f.write(JOURNAL_RECORD.pack(seq, timestamp, key.encode('utf-8')[:23], mask))
+            self.sizes[username] = self.sizes.get(username, 0) + JOURNAL_RECORD.size
+
+    def record_count(self, username):
+        return self.sizes.get(username, 0) // JOURNAL_RECORD.size
+
+    def position(self, username):
+        with self.lock:
+            return self.last_seq.get(username, 0), self.sizes.get(username, 0)
+
+    def flush(self):
+        with self.lock:
+            for f in self.files.values():
+                f.flush()
+
+    def compact(self, username, offset):
+        # 检查点已包含 offset 之前的记录，只保留之后追加的部分
+        with self.lock:
+            f = self.files.pop(username, None)
+            if f is not None:
+                f.close()
+            path = self.journal_path(username)
+            if not os.path.exists(path):
+                return
+            with open(path, 'rb') as f:
+                f.seek(offset)
+                tail = f.read()
+            tmp_path = path + '.tmp'
+            with open(tmp_path, 'wb') as f:
+                f.write(tail)
+            os.replace(tmp_path, path)
+            self.sizes[username] = len(tail)
+
+    def forget(self, username):
+        with self.lock:
+            f = self.files.pop(username, None)
+            if f is not None:
+                f.close()
+            self.sizes.pop(username, None)
+            self.last_seq.pop(username, None)
+
+    def remove(self, username):
+        with self.lock:
+            f = self.files.pop(username, None)
+            if f is not None:
+                f.close()
+            path = self.journal_path(username)
+            if os.path.exists(path):
+                os.remove(path)
+            self.sizes[username] = 0
+
+    def close(self):
+        with self.lock:
+            for f in self.files.values():
+                f.close()
+            self.files.clear()
+
 
 class DataProcessor:
-    def __init__(self):
+    def __init__(self, data_dir=None):
+        # user_data 只保存已加载的用户，完整用户列表见 users（users.json 索引）
         self.user_data = {}
+        self.users = []
         self.current_user = "guest"
-        self.data_dir = os.path.join(os.path.expanduser('~'), '.keymira')
+        self.data_dir = data_dir or os.path.join(os.path.expanduser('~'), '.keymira')
         self.guest_file = os.path.join(self.data_dir, "guest_data.json")
+        self.index_file = os.path.join(self.data_dir, "users.json")
+        # 写回缓存：按键只更新内存，脏用户按时间或按键数阈值批量落盘
+        self.dirty_users = set()
+        # 快照落后于内存但不必立即写盘的用户（如打字动态统计），随检查点一起写入
+        self.stale_users = set()
+        self.unsaved_keys = 0
+        self.last_flush_time = time.time()
+        # 每次按键只追加一条日志，JSON 快照作为检查点在后台定期合并日志
+        self.journal = KeyJournal(self.data_dir)
+        self.compaction_thread = None
+        self.last_checkpoint_time = time.time()
+        self.load_storage_settings()
+        # 可选的 SQLite 时间序列存储，启用后按键写入 SQLite 而不是日志
+        self.store = None
+        if self.storage_backend == 'sqlite':
+            self.store = SQLiteKeyStore(os.path.join(self.data_dir, 'keymira.db'),
+                                        RetentionPolicy(self.rollup_retention_days))
+        self.last_key_time = 0
+        self.last_retention_time = 0
+        self.saved_vocabulary_size = 0
         self.load_data()
 
+    def load_storage_settings(self):
+        try:
+            with open('settings.json', 'r') as f:
+                settings = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            settings = {}
+        # flush_interval_ms: 最长多久落盘一次
+        # max_unsaved_keys: 崩溃时最多丢失的按键数，0 表示每次按键都立即写盘
+        self.flush_interval_ms = settings.get('flush_interval_ms', 5000)
+        self.max_unsaved_keys = settings.get('max_unsaved_keys', 100)
+        # checkpoint_interval_ms / journal_max_records: 日志合并进快照的时间和大小阈值
+        self.checkpoint_interval_ms = settings.get('checkpoint_interval_ms', 60000)
+        self.journal_max_records = settings.get('journal_max_records', 20000)
+        # storage_backend: "json"（快照 + 日志）、"sqlite"（带小时/天汇总的时间序列）
+        # 或 "mmap"（计数直接存放在内存映射的二进制文件中）
+        self.storage_backend = settings.get('storage_backend', 'json')
+        # rollup_retention_days: 各粒度（minute/hour/day/month）保留天数，null 表示永久保留
+        # rollup_idle_ms / rollup_interval_ms: 空闲多久后清理过期的细粒度桶，以及两次清理的最短间隔
+        self.rollup_retention_days = settings.get('rollup_retention_days', {})
+        self.rollup_idle_ms = settings.get('rollup_idle_ms', 60000)
+        self.rollup_interval_ms = settings.get('rollup_interval_ms', 3600000)
+
+    def mark_dirty(self, username=None):
+        self.dirty_users.add(username or self.current_user)
+
     def get_user_list(self):
-        return [user for user in self.user_data.keys() if user != "guest"]
+        return [user for user in self.users if user != "guest"]
 
     def add_user(self, username):
-        if username not in self.user_data and username != "guest":
+        if username not in self.users and username != "guest":
             self.user_data[username] = {
-                'key_counts': {},
+                'key_counts': self.create_key_counter(username, reset=True),
                 'settings': {},
                 'styles': [],
-                'fonts': []
+                'fonts': [],
+                'typing': TypingDynamics(),
+                'transitions': TransitionStats(),
+                'chords': ChordCounter(),
+                'daily': DailyRangeIndex()
             }
+            self.users.append(username)
+            self.save_user_index()
+            self.mark_dirty(username)
             self.save_data()
             return True
         return False
 
     def remove_user(self, username):
-        if username in self.user_data and username != "guest":
-            del self.user_data[username]
-            file_path = os.path.join(self.data_dir, f"{username}_data.json")
-            if os.path.exists(file_path):
-                os.remove(file_path)
-            self.save_data()
+        if username in self.users and username != "guest":
+            self.wait_for_compaction()
+            self.close_key_counter(username)
+            self.user_data.pop(username, None)
+            self.users.remove(username)
+            self.save_user_index()
+            self.dirty_users.discard(username)
+            self.journal.remove(username)
+            if self.store is not None:
+                self.store.delete_user(username)
+            for file_path in (os.path.join(self.data_dir, f"{username}_data.json"), self.counts_path(username)):
+                if os.path.exists(file_path):
+                    os.remove(file_path)
             return True
         return False
 
     def set_current_user(self, username):
-        if username in self.user_data:
+        if username in self.users:
+            self.ensure_user_loaded(username)
             self.current_user = username
             if username == "guest":
                 self.cleanup_guest_data()
+            self.evict_inactive_users()
             return True
         return False
 
+    def ensure_user_loaded(self, username):
+        if username not in self.user_data:
+            self.load_user(username)
+        return self.user_data[username]
+
+    def evict_inactive_users(self):
+        # 非当前用户写回检查点后从内存中移除，下次切换时再按需加载
+        for username in list(self.user_data):
+            if username == self.current_user:
+                continue
+            if username in self.dirty_users or self.needs_checkpoint(username):
+                self.checkpoint(username)
+                self.dirty_users.discard(username)
+            self.journal.forget(username)
+            self.close_key_counter(username)
+            del self.user_data[username]
+
+    def counts_path(self, username):
+        return os.path.join(self.data_dir, f"{username}_counts.bin")
+
+    def create_key_counter(self, username, counts=None, reset=False):
+        if self.storage_backend != 'mmap':
+            return KeyCounter(counts)
+        self.close_key_counter(username)
+        path = self.counts_path(username)
+        if reset and os.path.exists(path):
+            os.remove(path)
+        os.makedirs(self.data_dir, exist_ok=True)
+        counter = MmapKeyCounter(path)
+        if counter.created and counts:
+            # 首次切换到 mmap 存储时从 JSON 快照迁移计数
+            counter.update(counts)
+            self.save_vocabulary()
+        return counter
+
+    def close_key_counter(self, username):
+        key_counts = self.user_data.get(username, {}).get('key_counts')
+        if isinstance(key_counts, MmapKeyCounter):
+            key_counts.close()
+
+    def load_vocabulary(self):
+        try:
+            with open(os.path.join(self.data_dir, 'vocabulary.json'), 'r') as f:
+                names = json.load(f)['names']
+        except (FileNotFoundError, json.JSONDecodeError, KeyError):
+            names = []
+        if not VOCABULARY.extend(names):
+            print("警告：按键词表与计数文件不一致")
+        self.saved_vocabulary_size = len(names)
+        if len(VOCABULARY) > self.saved_vocabulary_size:
+            self.save_vocabulary()
+
+    def save_vocabulary(self):
+        # 计数文件中的槽位按词表 id 排列，新 id 写入计数前先持久化词表
+        self.write_json_atomic(os.path.join(self.data_dir, 'vocabulary.json'), {'names': VOCABULARY.names})
+        self.saved_vocabulary_size = len(VOCABULARY)
+
     def process_key(self, key):
-        keys = key.split('+')
-        for k in keys:
+        self.process_keys([(time.time(), key)])
+
+    def process_keys(self, batch, releases=()):
+        # batch: [(timestamp, key, 修饰键掩码), ...]（掩码可省略），releases: 同一时间窗口内的释放事件；
+        # 整批只做一次落盘检查
+        username = self.current_user
+        key_counts = self.user_data[username]['key_counts']
+        transitions = self.user_data[username]['transitions']
+        chords = self.user_data[username]['chords']
+        daily = self.user_data[username]['daily']
+        repeats = self.update_typing_dynamics(self.user_data[username]['typing'], batch, releases)
+        self.stale_users.add(username)
+        intern = key_counts.vocabulary.intern
+        track_vocabulary = self.storage_backend == 'mmap'
+        journal = self.store is None and self.storage_backend != 'mmap'
+        for index, event in enumerate(batch):
+            timestamp, key = event[0], event[1]
+            keys = self.split_chord(key)
+            chord_mask = 0
+            if len(event) > 2 and event[2]:
+                chord_mask = event[2]
+            elif len(keys) > 1:
+                # 旧接口直接传入 'ctrl+shift+s' 这样的组合键字符串
+                chord = parse_chord(keys)
+                if chord is not None:
+                    chord_mask = chord[0]
+            if chord_mask:
+                chords.add(chord_mask, intern(keys[-1]))
+            last = len(keys) - 1
+            for position, k in enumerate(keys):
+                key_id = intern(k)
+                if track_vocabulary and key_id >= self.saved_vocabulary_size:
+                    self.save_vocabulary()
+                key_counts.add(key_id)
+                if index not in repeats:
+                    # 自动重复不算按键转移，否则按住一个键会刷出大量 a→a
+                    transitions.on_key(timestamp, key_id)
+                daily.add(key_id, timestamp)
+                if self.store is not None:
+                    self.store.record(username, k, timestamp)
+                elif journal:
+                    # 掩码记在主键上，崩溃后重放日志时一并恢复组合键计数
+                    self.journal.append(username, k, timestamp, chord_mask if position == last else 0)
+        self.unsaved_keys += len(batch)
+        self.last_key_time = time.time()
+        if self.should_flush():
+            self.flush()
+
+    def update_typing_dynamics(self, dynamics, batch, releases):
+        # 按时间顺序合并按下与释放事件，返回属于自动重复的按下事件在 batch 中的下标
+        presses = ((event[0], event[1], True, index) for index, event in enumerate(batch))
+        released = ((timestamp, key, False, -1) for timestamp, key in releases)
+        repeats = set()
+        for timestamp, key, pressed, index in heapq.merge(presses, released):
+            if pressed:
+                if not dynamics.on_press(timestamp, key):
+                    repeats.add(index)
+            else:
+                dynamics.on_release(timestamp, key)
+        if batch:
+            dynamics.update_peak(batch[-1][0])
+        return repeats
+
+    def split_chord(self, key):
+        if len(key) == 1:
+            return [key.lower()]
+        keys = []
+        for k in key.split('+'):
             k = k.strip().lower()
-            if k == '':
-                k = 'space'
-            self.user_data[self.current_user]['key_counts'][k] = self.user_data[self.current_user]['key_counts'].get(k, 0) + 1
-        self.save_data()
+            keys.append(k if k else 'space')
+        return keys
+
+    def should_flush(self):
+        if self.unsaved_keys >= self.max_unsaved_keys:
+            return True
+        return (time.time() - self.last_flush_time) * 1000 >= self.flush_interval_ms
 
     def get_key_stats(self):
         return self.user_data[self.current_user]['key_counts']
 
+    def get_typing_stats(self):
+        return self.user_data[self.current_user]['typing'].summary()
+
+    def get_top_transitions(self, n=20):
+        return self.user_data[self.current_user]['transitions'].top_bigrams(n)
+
+    def get_top_sequences(self, n=20):
+        return self.user_data[self.current_user]['transitions'].top_trigrams(n)
+
+    def get_shortcut_stats(self):
+        return self.user_data[self.current_user]['chords']
+
+    def get_top_shortcuts(self, n=20):
+        return self.user_data[self.current_user]['chords'].top(n)
+
+    def get_key_count_between(self, start_date, end_date, keys=None):
+        # 闭区间 [start_date, end_date] 内 keys 的按键次数，keys 为 None 时统计所有按键
+        return self.user_data[self.current_user]['daily'].count(start_date, end_date, keys)
+
+    def get_key_stats_between(self, start_date, end_date):
+        return self.user_data[self.current_user]['daily'].counts_by_key(start_date, end_date)
+
+    def get_recent_key_stats(self, hours=24):
+        if self.store is None:
+            return {}
+        now = time.time()
+        return self.store.get_range_stats(self.current_user, now - hours * 3600, now)
+
+    def get_range_key_stats(self, start, end):
+        if self.store is None:
+            return {}
+        return self.store.get_range_stats(self.current_user, start, end)
+
+    def get_daily_totals(self, days=30):
+        if self.store is None:
+            return []
+        return self.store.get_daily_totals(self.current_user, days)
+
+    def get_hour_of_day_totals(self):
+        if self.store is None:
+            return [0] * 24
+        return self.store.get_hour_of_day_totals(self.current_user)
+
     def save_data(self):
+        self.flush()
+
+    def flush(self):
+        self.journal.flush()
+        if self.store is not None:
+            self.store.flush()
+        for data in self.user_data.values():
+            if isinstance(data['key_counts'], MmapKeyCounter):
+                data['key_counts'].sync()
+        if self.dirty_users:
+            for username in list(self.dirty_users):
+                if username in self.user_data:
+                    self.checkpoint(username)
+            self.dirty_users.clear()
+        self.unsaved_keys = 0
+        self.last_flush_time = time.time()
+        if self.should_compact():
+            self.compact_in_background()
+        if self.should_apply_retention():
+            self.store.apply_retention(self.users)
+            self.last_retention_time = time.time()
+
+    def should_apply_retention(self):
+        # 只在空闲时降采样，避免打字时阻塞主线程
+        if self.store is None:
+            return False
+        now = time.time()
+        if (now - self.last_key_time) * 1000 < self.rollup_idle_ms:
+            return False
+        return (now - self.last_retention_time) * 1000 >= self.rollup_interval_ms
+
+    def needs_checkpoint(self, username):
+        return username in self.stale_users or self.journal.record_count(username) > 0
+
+    def should_compact(self):
+        if not any(self.needs_checkpoint(username) for username in self.user_data):
+            return False
+        if max(self.journal.record_count(username) for username in self.user_data) >= self.journal_max_records:
+            return True
+        return (time.time() - self.last_checkpoint_time) * 1000 >= self.checkpoint_interval_ms
+
+    def checkpoint(self, username):
+        self.wait_for_compaction()
+        self.stale_users.discard(username)
+        seq, offset = self.journal.position(username)
+        self.write_checkpoint(username, self.user_data[username], seq, offset)
+
+    def write_checkpoint(self, username, data, seq, offset):
+        file_path = os.path.join(self.data_dir, f"{username}_data.json")
+        self.write_json_atomic(file_path, self.serialize_user_data(data, checkpoint_seq=seq))
+        self.journal.compact(username, offset)
+
+    def serialize_user_data(self, data, **extra):
+        return dict(data, key_counts=dict(data['key_counts']), typing=data['typing'].to_dict(),
+                    transitions=data['transitions'].to_dict(), chords=data['chords'].to_list(),
+                    daily=data['daily'].to_dict(), **extra)
+
+    def write_json_atomic(self, file_path, data):
+        # 先写临时文件再原子替换，崩溃时旧快照 + 日志仍然完整
         os.makedirs(self.data_dir, exist_ok=True)
+        tmp_path = file_path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(data, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, file_path)
+
+    def compact_in_background(self):
+        if self.compaction_thread is not None and self.compaction_thread.is_alive():
+            return
+        snapshots = []
         for username, data in self.user_data.items():
-            file_path = os.path.join(self.data_dir, f"{username}_data.json")
-            with open(file_path, 'w') as f:
-                json.dump(data, f)
+            if self.needs_checkpoint(username):
+                seq, offset = self.journal.position(username)
+                snapshots.append((username, copy.deepcopy(data), seq, offset))
+        self.stale_users.clear()
+        self.last_checkpoint_time = time.time()
+        self.compaction_thread = threading.Thread(target=self.run_compaction, args=(snapshots,), daemon=True)
+        self.compaction_thread.start()
+
+    def run_compaction(self, snapshots):
+        for username, data, seq, offset in snapshots:
+            try:
+                self.write_checkpoint(username, data, seq, offset)
+            except OSError as e:
+                print(f"合并日志失败 {username}: {e}")
+
+    def wait_for_compaction(self):
+        if self.compaction_thread is not None:
+            self.compaction_thread.join()
+            self.compaction_thread = None
+
+    def close(self):
+        self.flush()
+        self.wait_for_compaction()
+        for username in self.user_data:
+            if self.needs_checkpoint(username):
+                self.checkpoint(username)
+        self.journal.close()
+        for username in self.user_data:
+            self.close_key_counter(username)
+        if self.store is not None:
+            self.store.close()
 
     def load_data(self):
         if not os.path.exists(self.data_dir):
             os.makedirs(self.data_dir)
-        for file in os.listdir(self.data_dir):
-            if file.endswith("_data.json"):
-                username = file[:-10]  # Remove "_data.json"
-                file_path = os.path.join(self.data_dir, file)
-                with open(file_path, 'r') as f:
-                    self.user_data[username] = json.load(f)
-        if "guest" not in self.user_data:
-            self.user_data["guest"] = {
-                'key_counts': {},
-                'settings': self.get_default_settings(),
+        if self.storage_backend == 'mmap':
+            self.load_vocabulary()
+        # 启动时只读取用户索引和当前用户的数据
+        self.load_user_index()
+        self.ensure_user_loaded(self.current_user)
+
+    def load_user_index(self):
+        try:
+            with open(self.index_file, 'r') as f:
+                self.users = json.load(f)['users']
+        except (FileNotFoundError, json.JSONDecodeError, KeyError):
+            # 旧版本没有索引，按文件名重建（不解析文件内容）
+            self.users = [file[:-10] for file in os.listdir(self.data_dir) if file.endswith("_data.json")]
+            self.save_user_index()
+        if "guest" not in self.users:
+            self.users.insert(0, "guest")
+
+    def save_user_index(self):
+        self.write_json_atomic(self.index_file, {'users': self.users})
+
+    def load_user(self, username):
+        file_path = os.path.join(self.data_dir, f"{username}_data.json")
+        if not os.path.exists(file_path):
+            self.journal.remove(username)
+            self.user_data[username] = {
+                'key_counts': self.create_key_counter(username),
+                'settings': self.get_default_settings() if username == "guest" else {},
                 'styles': [],
-                'fonts': []
+                'fonts': [],
+                'typing': TypingDynamics(),
+                'transitions': TransitionStats(),
+                'chords': ChordCounter(),
+                'daily': DailyRangeIndex()
             }
+            return
+        with open(file_path, 'r') as f:
+            data = json.load(f)
+        checkpoint_seq = data.pop('checkpoint_seq', 0)
+        key_counts = data['key_counts'] = self.create_key_counter(username, data.get('key_counts'))
+        data['typing'] = TypingDynamics.from_dict(data.get('typing'))
+        data['transitions'] = TransitionStats.from_dict(data.get('transitions'))
+        chords = data['chords'] = ChordCounter.from_list(data.get('chords'))
+        daily = data['daily'] = DailyRangeIndex.from_dict(data.get('daily'))
+        # 重放检查点之后的日志
+        for timestamp, k, mask in self.journal.replay(username, checkpoint_seq):
+            key_id = key_counts.vocabulary.intern(k)
+            key_counts.add(key_id)
+            daily.add(key_id, timestamp)
+            if mask:
+                chords.add(mask, key_id)
+        if self.store is not None:
+            if self.store.has_user(username):
+                data['key_counts'] = KeyCounter(self.store.load_totals(username))
+                data['daily'] = DailyRangeIndex.from_daily_rows(self.store.get_daily_rows(username))
+            elif key_counts:
+                self.store.set_totals(username, key_counts)
+        self.user_data[username] = data
 
     def clear_data(self):
         self.user_data[self.current_user] = {
-            'key_counts': {},
+            'key_counts': self.create_key_counter(self.current_user, reset=True),
             'settings': {},
             'styles': [],
-            'fonts': []
+            'fonts': [],
+            'typing': TypingDynamics(),
+            'transitions': TransitionStats(),
+            'chords': ChordCounter(),
+            'daily': DailyRangeIndex()
         }
+        if self.store is not None:
+            self.store.delete_user(self.current_user)
+        self.mark_dirty()
         self.save_data()
 
     def export_data(self, file_path):
+        self.mark_dirty()
+        self.flush()
         shutil.copy2(os.path.join(self.data_dir, f"{self.current_user}_data.json"), file_path)
 
     def import_data(self, file_path):
         with open(file_path, 'r') as f:
             imported_data = json.load(f)
+        imported_data.pop('checkpoint_seq', None)
+        imported_data['key_counts'] = self.create_key_counter(self.current_user, imported_data.get('key_counts'), reset=True)
+        imported_data['typing'] = TypingDynamics.from_dict(imported_data.get('typing'))
+        imported_data['transitions'] = TransitionStats.from_dict(imported_data.get('transitions'))
+        imported_data['chords'] = ChordCounter.from_list(imported_data.get('chords'))
+        imported_data['daily'] = DailyRangeIndex.from_dict(imported_data.get('daily'))
         self.user_data[self.current_user] = imported_data
+        if self.store is not None:
+            self.store.set_totals(self.current_user, imported_data.get('key_counts', {}))
+        self.mark_dirty()
         self.save_data()
 
     def get_user_settings(self, username):
-        if username in self.user_data:
-            return self.user_data[username].get('settings', {})
+        if username in self.users:
+            return self.ensure_user_loaded(username).get('settings', {})
         return {}
 
     def save_user_settings(self, username, settings):
-        if username in self.user_data:
-            self.user_data[username]['settings'] = settings
+        if username in self.users:
+            self.ensure_user_loaded(username)['settings'] = settings
+            self.mark_dirty(username)
             self.save_data()
 
     def update_settings(self, settings):
         self.user_data[self.current_user]['settings'] = settings
+        self.mark_dirty()
         self.save_data()
 
     def get_default_settings(self):
@@ -130,20 +640,30 @@ class DataProcessor:
     def add_style(self, style_id):
         if style_id not in self.user_data[self.current_user]['styles']:
             self.user_data[self.current_user]['styles'].append(style_id)
+            self.mark_dirty()
             self.save_data()
 
     def add_font(self, font_name):
         if font_name not in self.user_data[self.current_user]['fonts']:
             self.user_data[self.current_user]['fonts'].append(font_name)
+            self.mark_dirty()
             self.save_data()
 
     def cleanup_guest_data(self):
+        self.wait_for_compaction()
         if os.path.exists(self.guest_file):
             os.remove(self.guest_file)
         self.user_data["guest"] = {
-            'key_counts': {},
+            'key_counts': self.create_key_counter("guest", reset=True),
             'settings': self.get_default_settings(),
             'styles': [],
-            'fonts': []
+            'fonts': [],
+            'typing': TypingDynamics(),
+            'transitions': TransitionStats(),
+            'chords': ChordCounter(),
+            'daily': DailyRangeIndex()
         }
+        if self.store is not None:
+            self.store.delete_user("guest")
+        self.mark_dirty("guest")
         self.save_data()
@@ -0,0 +1,49 @@
+class EventRingBuffer:
+    # 单生产者（键盘钩子线程）/ 单消费者（Qt 线程）的定长环形缓冲区。
+    # head 只由生产者推进，tail 只由消费者推进，两边都不需要加锁。
+    def __init__(self, capacity=1024):
+        self.capacity = capacity
+        self.slots = [None] * capacity
+        self.head = 0
+        self.tail = 0
+        self.dropped = 0
+        self.high_water = 0
+
+    def push(self, event):
+        head = self.head
+        if head - self.tail >= self.capacity:
+            self.dropped += 1
+            return False
+        self.slots[head % self.capacity] = event
+        # 先写槽位再推进 head，消费者看到新的 head 时事件一定已经写好
+        self.head = head + 1
+        return True
+
+    def drain(self):
+        tail = self.tail
+        head = self.head
+        if head == tail:
+            return []
+        self.high_water = max(self.high_water, head - tail)
+        capacity = self.capacity
+        events = []
+        for index in range(tail, head):
+            slot = index % capacity
+            events.append(self.slots[slot])
+            self.slots[slot] = None
+        self.tail = head
+        return events
+
+    def full(self):
+        return self.head - self.tail >= self.capacity
+
+    def __len__(self):
+        return self.head - self.tail
+
+    def get_stats(self):
+        return {
+            'pushed': self.head + self.dropped,
+            'dropped': self.dropped,
+            'high_water': self.high_water,
+            'capacity': self.capacity,
+        }
@@ -0,0 +1,113 @@
+import json
+import threading
+import time
+from pynput import keyboard
+from .key_table import VK_NAMES
+
+# 回放事件的按键名 -> 虚拟键码。命名键也按 vk 上报，不依赖各平台 keyboard.Key 的枚举值
+# （dummy 后端下所有 Key 成员都是同一个值）
+REPLAY_VKS = {name: vk for vk, name in VK_NAMES.items()}
+REPLAY_VKS.update({
+    'ctrl_l': 17, 'ctrl_r': 17, 'shift_l': 16, 'shift_r': 16, 'alt_l': 18, 'alt_r': 18, 'alt_gr': 18,
+    'cmd': 91, 'cmd_l': 91, 'cmd_r': 92,
+})
+
+
+class InputSource:
+    # 输入源接口：start 后在自己的线程里调用 on_press / on_release 回调
+    def start(self, on_press, on_release):
+        raise NotImplementedError
+
+    def stop(self):
+        raise NotImplementedError
+
+
+class PynputInputSource(InputSource):
+    def __init__(self):
+        self.listener = None
+
+    def start(self, on_press, on_release):
+        if not self.listener:
+            self.listener = keyboard.Listener(on_press=on_press, on_release=on_release)
+            self.listener.start()
+
+    def stop(self):
+        if self.listener:
+            self.listener.stop()
+            self.listener = None
+
+
+class ReplayInputSource(InputSource):
+    # 回放录制或合成的事件流，speed=1 为实时，2 为两倍速，0 为不等待（最大速度）。
+    # 设置 backpressure（EventRingBuffer）后，缓冲区满时等待消费者腾出槽位而不是丢弃事件
+    def __init__(self, events, speed=1.0, backpressure=None):
+        self.events = events
+        self.speed = speed
+        self.backpressure = backpressure
+        self.thread = None
+        self.stopped = threading.Event()
+        self.finished = threading.Event()
+
+    @classmethod
+    def from_file(cls, path, speed=1.0):
+        # JSON lines: {"key": "a" | "ctrl_l" | ..., "vk": 65（可选）, "event": "press" | "release", "t": 秒}
+        with open(path, 'r', encoding='utf-8') as f:
+            events = [json.loads(line) for line in f if line.strip()]
+        return cls(events, speed)
+
+    def start(self, on_press, on_release):
+        if self.thread is None:
+            self.stopped.clear()
+            self.finished.clear()
+            self.thread = threading.Thread(target=self.run, args=(on_press, on_release), daemon=True)
+            self.thread.start()
+
+    def stop(self):
+        if self.thread is not None:
+            self.stopped.set()
+            self.thread.join()
+            self.thread = None
+
+    def run(self, on_press, on_release):
+        keys = [(event.get('event', 'press') == 'press', self.to_key(event), event.get('t', 0.0))
+                for event in self.events]
+        start_time = time.perf_counter()
+        first_t = keys[0][2] if keys else 0.0
+        for pressed, key, t in keys:
+            if self.stopped.is_set():
+                break
+            if self.speed:
+                delay = (t - first_t) / self.speed - (time.perf_counter() - start_time)
+                if delay > 0:
+                    self.stopped.wait(delay)
+            if self.backpressure is not None:
+                while self.backpressure.full() and not self.stopped.is_set():
+                    self.stopped.wait(0.001)
+            if pressed:
+                on_press(key)
+            else:
+                on_release(key)
+        self.finished.set()
+
+    def to_key(self, event):
+        if 'vk' in event:
+            return keyboard.KeyCode.from_vk(event['vk'])
+        name = event['key']
+        # 与 Windows 钩子一致，能对应虚拟键码的按键都以 vk 上报
+        vk = REPLAY_VKS.get(name.lower())
+        if vk is not None:
+            return keyboard.KeyCode.from_vk(vk)
+        if name in keyboard.Key.__members__:
+            return keyboard.Key[name]
+        return keyboard.KeyCode.from_char(name)
+
+
+def synthetic_events(text, interval=0.1, dwell=0.05):
+    events = []
+    t = 0.0
+    for char in text:
+        key = 'space' if char == ' ' else char
+        events.append({'key': key, 'event': 'press', 't': t})
+        events.append({'key': key, 'event': 'release', 't': t + dwell})
+        t += interval
+    return events
@@ -0,0 +1,193 @@
+import mmap
+import os
+import struct
+import sys
+from array import array
+from collections.abc import MutableMapping
+
+# 预置常用键，保证它们在每次启动时得到相同且连续的 id
+BASE_KEYS = (
+    [chr(c) for c in range(ord('a'), ord('z') + 1)]
+    + [str(d) for d in range(10)]
+    + [';', '=', ',', '-', '.', '/', '`', '[', '\\', ']', "'", '+', '*']
+    + ['ctrl', 'alt', 'shift', 'win', 'fn']
+    + [f'f{n}' for n in range(1, 13)]
+    + ['space', 'enter', 'tab', 'backspace', 'esc', 'caps_lock', 'delete', 'insert',
+       'home', 'end', 'page_up', 'page_down', 'up', 'down', 'left', 'right',
+       'pause', 'num_lock', 'print_screen', 'scroll_lock', 'menu']
+)
+
+COUNTER_GROWTH = 64
+
+# 计数文件头: 魔数, 格式版本, 词表版本（写入时的词表大小）, 槽位数
+MMAP_HEADER = struct.Struct('<4sIII')
+MMAP_MAGIC = b'KMC1'
+MMAP_FORMAT_VERSION = 1
+
+
+class KeyVocabulary:
+    def __init__(self, names=()):
+        self.names = []
+        self.ids = {}
+        for name in names:
+            self.intern(name)
+
+    def intern(self, name):
+        key_id = self.ids.get(name)
+        if key_id is None:
+            name = sys.intern(name)
+            key_id = len(self.names)
+            self.ids[name] = key_id
+            self.names.append(name)
+        return key_id
+
+    def __len__(self):
+        return len(self.names)
+
+    def extend(self, names):
+        # 按持久化顺序恢复词表，返回 id 是否与文件一致
+        consistent = True
+        for index, name in enumerate(names):
+            if self.intern(name) != index:
+                consistent = False
+        return consistent
+
+
+VOCABULARY = KeyVocabulary(BASE_KEYS)
+
+
+class KeyCounter(MutableMapping):
+    # 以 id 为下标的连续 uint64 计数数组，对外表现为 {按键名: 次数} 字典
+    def __init__(self, counts=None, vocabulary=VOCABULARY):
+        self.vocabulary = vocabulary
+        self.counts = array('Q')
+        self.grow(len(vocabulary))
+        if counts:
+            self.update(counts)
+
+    def grow(self, size):
+        # 总是换一块新缓冲区，外部持有的旧数组视图（如 numpy.frombuffer）不会失效或阻止扩容
+        capacity = (size // COUNTER_GROWTH + 1) * COUNTER_GROWTH
+        counts = array('Q', bytes(8 * capacity))
+        counts[0:len(self.counts)] = self.counts
+        self.counts = counts
+
+    def add(self, key_id, n=1):
+        if key_id >= len(self.counts):
+            self.grow(key_id + 1)
+        self.counts[key_id] += n
+
+    def add_key(self, name, n=1):
+        self.add(self.vocabulary.intern(name), n)
+
+    def as_array(self):
+        return self.counts
+
+    def __getitem__(self, name):
+        key_id = self.vocabulary.ids.get(name)
+        if key_id is None or key_id >= len(self.counts) or not self.counts[key_id]:
+            raise KeyError(name)
+        return self.counts[key_id]
+
+    def get(self, name, default=None):
+        key_id = self.vocabulary.ids.get(name)
+        if key_id is None or key_id >= len(self.counts) or not self.counts[key_id]:
+            return default
+        return self.counts[key_id]
+
+    def __setitem__(self, name, value):
+        key_id = self.vocabulary.intern(name)
+        if key_id >= len(self.counts):
+            self.grow(key_id + 1)
+        self.counts[key_id] = value
+
+    def __delitem__(self, name):
+        key_id = self.vocabulary.ids.get(name)
+        if key_id is None or key_id >= len(self.counts) or not self.counts[key_id]:
+            raise KeyError(name)
+        self.counts[key_id] = 0
+
+    def __iter__(self):
+        names = self.vocabulary.names
+        for key_id, count in enumerate(self.counts):
+            if count:
+                yield names[key_id]
+
+    def __len__(self):
+        return len(self.counts) - self.counts.count(0)
+
+    def __deepcopy__(self, memo):
+        counter = KeyCounter(vocabulary=self.vocabulary)
+        counter.counts = array('Q', self.counts)
+        return counter
+
+    def __repr__(self):
+        return f"KeyCounter({dict(self)!r})"
+
+
+class MmapKeyCounter(KeyCounter):
+    # 计数直接存放在内存映射文件里，按键只是给槽位加一，由系统负责回写
+    def __init__(self, path, vocabulary=VOCABULARY):
+        self.path = path
+        self.vocabulary = vocabulary
+        self.map = None
+        self.counts = array('Q')
+        self.created = not os.path.exists(path)
+        if self.created:
+            with open(path, 'wb') as f:
+                f.write(MMAP_HEADER.pack(MMAP_MAGIC, MMAP_FORMAT_VERSION, len(vocabulary), 0))
+            self.grow(len(vocabulary))
+        else:
+            self.open_map()
+            if len(self.counts) < len(vocabulary):
+                self.grow(len(vocabulary))
+
+    def open_map(self):
+        with open(self.path, 'r+b') as f:
+            header = f.read(MMAP_HEADER.size)
+            magic, version, vocabulary_size, capacity = MMAP_HEADER.unpack(header)
+            if magic != MMAP_MAGIC or version != MMAP_FORMAT_VERSION:
+                raise ValueError(f"Unsupported counter file: {self.path}")
+            size = os.fstat(f.fileno()).st_size
+            capacity = min(capacity, (size - MMAP_HEADER.size) // 8)
+            self.map = mmap.mmap(f.fileno(), MMAP_HEADER.size + capacity * 8)
+        self.counts = memoryview(self.map)[MMAP_HEADER.size:].cast('Q')
+
+    def grow(self, size):
+        capacity = (size // COUNTER_GROWTH + 1) * COUNTER_GROWTH
+        self.release_map()
+        with open(self.path, 'r+b') as f:
+            f.truncate(MMAP_HEADER.size + capacity * 8)
+            f.write(MMAP_HEADER.pack(MMAP_MAGIC, MMAP_FORMAT_VERSION, len(self.vocabulary), capacity))
+        self.open_map()
+
+    def release_map(self):
+        if self.map is None:
+            return
+        self.map.flush()
+        try:
+            self.counts.release()
+            self.map.close()
+        except BufferError:
+            # 外部仍持有旧映射的视图，交给垃圾回收释放
+            pass
+        self.counts = array('Q')
+        self.map = None
+
+    def sync(self):
+        if self.map is not None:
+            MMAP_HEADER.pack_into(self.map, 0, MMAP_MAGIC, MMAP_FORMAT_VERSION,
+                                  len(self.vocabulary), len(self.counts))
+            self.map.flush()
+
+    def close(self):
+        self.release_map()
+
+    def __len__(self):
+        return sum(1 for count in self.counts if count)
+
+    def __deepcopy__(self, memo):
+        counter = KeyCounter(vocabulary=self.vocabulary)
+        counter.counts = array('Q')
+        counter.counts.frombytes(self.counts.tobytes())
+        return counter
@@ -0,0 +1,107 @@
+from collections import namedtuple
+from pynput import keyboard
+from .key_counter import VOCABULARY
+
+# 按键类别位掩码
+CATEGORY_MODIFIER = 1
+CATEGORY_FKEY = 2
+CATEGORY_NUMPAD = 4
+CATEGORY_NORMAL = 8
+
+# 显示设置与按键类别的对应关系
+DISPLAY_CATEGORIES = {
+    "display_顯示修飾鍵": CATEGORY_MODIFIER,
+    "display_顯示F1~F12": CATEGORY_FKEY,
+    "display_顯示小鍵盤": CATEGORY_NUMPAD,
+    "display_顯示普通鍵": CATEGORY_NORMAL,
+}
+
+MODIFIER_KEYS = {'ctrl', 'alt', 'shift', 'win', 'fn'}
+NUMPAD_KEYS = {'0', '1', '2', '3', '4', '5', '6', '7', '8', '9', '+', '-', '*', '/', 'enter', 'num_lock'}
+
+VK_NAMES = {
+    # 字母键
+    65: 'a', 66: 'b', 67: 'c', 68: 'd', 69: 'e', 70: 'f', 71: 'g', 72: 'h',
+    73: 'i', 74: 'j', 75: 'k', 76: 'l', 77: 'm', 78: 'n', 79: 'o', 80: 'p',
+    81: 'q', 82: 'r', 83: 's', 84: 't', 85: 'u', 86: 'v', 87: 'w', 88: 'x',
+    89: 'y', 90: 'z',
+    # 数字键
+    48: '0', 49: '1', 50: '2', 51: '3', 52: '4', 53: '5', 54: '6', 55: '7', 56: '8', 57: '9',
+    # 常用标点符号
+    186: ';', 187: '=', 188: ',', 189: '-', 190: '.', 191: '/', 192: '`',
+    219: '[', 220: '\\', 221: ']', 222: "'",
+    # 功能键
+    8: 'backspace', 9: 'tab', 13: 'enter', 16: 'shift', 17: 'ctrl', 18: 'alt',
+    19: 'pause', 20: 'caps_lock', 27: 'esc', 32: 'space', 33: 'page_up',
+    34: 'page_down', 35: 'end', 36: 'home', 37: 'left', 38: 'up', 39: 'right',
+    40: 'down', 45: 'insert', 46: 'delete', 91: 'win', 92: 'win', 93: 'menu', 144: 'num_lock',
+    112: 'f1', 113: 'f2', 114: 'f3', 115: 'f4', 116: 'f5', 117: 'f6',
+    118: 'f7', 119: 'f8', 120: 'f9', 121: 'f10', 122: 'f11', 123: 'f12',
+}
+
+SPECIAL_KEY_NAMES = {
+    keyboard.Key.ctrl_l: 'ctrl', keyboard.Key.ctrl_r: 'ctrl',
+    keyboard.Key.alt_l: 'alt', keyboard.Key.alt_r: 'alt',
+    keyboard.Key.shift_l: 'shift', keyboard.Key.shift_r: 'shift',
+    keyboard.Key.cmd: 'win', keyboard.Key.cmd_l: 'win', keyboard.Key.cmd_r: 'win',
+    keyboard.Key.space: 'space',
+}
+
+KeyInfo = namedtuple('KeyInfo', ['key_id', 'name', 'category'])
+
+
+def classify_key(name):
+    if name in MODIFIER_KEYS:
+        return CATEGORY_MODIFIER
+    if name.startswith('f') and name[1:].isdigit():
+        return CATEGORY_FKEY
+    if name in NUMPAD_KEYS:
+        return CATEGORY_NUMPAD
+    return CATEGORY_NORMAL
+
+
+class KeyTable:
+    # vk / keyboard.Key -> (规范 id, 名称, 类别) 的查找表，热路径上只做一次下标或字典查找。
+    # 表项在第一次遇到该键时生成并缓存，避免启动时把从未按过的键加入词表，
+    # 保证词表 id 与 mmap 计数文件持久化的顺序一致。
+    def __init__(self, fn_key_code):
+        self.fn_key_code = fn_key_code
+        self.by_name = {}
+        self.by_vk = [None] * 256
+        self.extra_vk = {}
+        self.by_special = {}
+
+    def info_for_name(self, name):
+        info = self.by_name.get(name)
+        if info is None:
+            info = self.by_name[name] = KeyInfo(VOCABULARY.intern(name), name, classify_key(name))
+        return info
+
+    def vk_name(self, vk):
+        if vk == self.fn_key_code:
+            return 'fn'
+        return VK_NAMES.get(vk, f'special_{vk}')
+
+    def lookup_vk(self, vk):
+        if 0 <= vk < 256:
+            info = self.by_vk[vk]
+            if info is None:
+                info = self.by_vk[vk] = self.info_for_name(self.vk_name(vk))
+            return info
+        info = self.extra_vk.get(vk)
+        if info is None:
+            info = self.extra_vk[vk] = self.info_for_name(self.vk_name(vk))
+        return info
+
+    def lookup(self, key):
+        if isinstance(key, keyboard.Key):
+            info = self.by_special.get(key)
+            if info is None:
+                info = self.by_special[key] = self.info_for_name(SPECIAL_KEY_NAMES.get(key, key.name.lower()))
+            return info
+        if isinstance(key, keyboard.KeyCode):
+            return self.lookup_vk(key.vk if key.vk else ord(key.char))
+        return self.info_for_name(str(key).lower())
+
+    def category(self, name):
+        return self.info_for_name(name).category
@@ -1,25 +1,53 @@
-from pynput import keyboard
 from PyQt5.QtCore import QObject, pyqtSignal, QTimer
 import time
 import json
+from .event_buffer import EventRingBuffer
+from .input_sources import PynputInputSource
+from .latency_probe import PROBE
+from .key_table import KeyTable, CATEGORY_MODIFIER, DISPLAY_CATEGORIES
+from .chord_stats import MODIFIER_BITS, MODIFIER_PREFIXES
 
 class KeyboardListener(QObject):
-    key_event = pyqtSignal(str)
+    # 显示内容为按键名列表（组合键为一项 'ctrl+s'），由悬浮窗逐项翻译成符号
+    key_event = pyqtSignal(list)
     clear_event = pyqtSignal()
-    key_for_stats = pyqtSignal(str)
+    keys_for_stats = pyqtSignal(list, list)
+    # 钩子线程发出，排队到界面线程：缓冲区由空变为非空
+    events_ready = pyqtSignal()
 
-    def __init__(self):
+    def __init__(self, input_source=None):
         super().__init__()
-        self.listener = None
-        self.modifier_keys = set()
+        # 输入源可替换，默认使用 pynput 全局钩子，测试和基准时可换成回放源
+        self.input_source = input_source or PynputInputSource()
+        self.listening = False
+        self.modifier_mask = 0
         self.last_key_time = 0
-        self.current_phrase = ""
+        self.current_phrase = []
+        # 系统自动重复：按住不放时重复收到按下事件，显示为 "×N" 而不是逐次刷新
+        self.held_keys = set()
+        self.repeat_key = None
+        self.repeat_base = None
+        self.repeat_count = 0
         self.load_settings()
         self.max_consecutive_chars = 11  # 默认值为11
         self.clear_timer = QTimer()
         self.clear_timer.setSingleShot(True)
         self.clear_timer.timeout.connect(self.clear_display)
         self.display_settings = {}
+        self.display_mask = sum(DISPLAY_CATEGORIES.values())
+        self.key_table = KeyTable(self.settings['fn_key_code'])
+        self.pending_keys = None
+        self.pending_key_time = None
+        # 钩子回调只把原始事件放进环形缓冲区，由 Qt 线程上的定时器批量处理
+        self.event_buffer = EventRingBuffer(self.settings['event_buffer_size'])
+        self.reported_dropped = 0
+        # 统计事件按时间窗口攒批后一次性发送
+        self.pending_stats = []
+        self.pending_releases = []
+        # 只在有事件或有未发送的统计时运行，空闲时停止，由 events_ready 重新唤醒
+        self.drain_timer = QTimer()
+        self.drain_timer.timeout.connect(self.drain_events)
+        self.events_ready.connect(self.wake_drain)
 
     def load_settings(self):
         try:
@@ -33,6 +61,12 @@ class KeyboardListener(QObject):
             self.settings['fn_key_code'] = 0x1D
         if 'max_consecutive_chars' not in self.settings:
             self.settings['max_consecutive_chars'] = 11
+        if 'event_buffer_size' not in self.settings:
+            self.settings['event_buffer_size'] = 1024
+        if 'event_drain_interval_ms' not in self.settings:
+            self.settings['event_drain_interval_ms'] = 10
+        if 'stats_batch_window_ms' not in self.settings:
+            self.settings['stats_batch_window_ms'] = 100
         
         self.max_consecutive_chars = self.settings['max_consecutive_chars']
         self.save_settings()
@@ -48,48 +82,121 @@ class KeyboardListener(QObject):
 
     def update_display_settings(self, settings):
         self.display_settings = {k: v for k, v in settings.items() if k.startswith("display_")}
+        self.display_mask = 0
+        for option, category in DISPLAY_CATEGORIES.items():
+            if self.display_settings.get(option, True):
+                self.display_mask |= category
 
     def on_press(self, key):
-        current_time = time.time()
-        key_char = self.normalize_key(key)
-        print(f"按下的键: {key_char}")  # 调试信息
+        self.push_event((time.time(), True, key))
+
+    def on_release(self, key):
+        self.push_event((time.time(), False, key))
+
+    def push_event(self, event):
+        # 缓冲区非空时消费者的定时器一定在运行，只有由空变为非空才需要唤醒
+        was_empty = not len(self.event_buffer)
+        if self.event_buffer.push(event) and was_empty:
+            self.events_ready.emit()
+
+    def wake_drain(self):
+        if self.listening and not self.drain_timer.isActive():
+            self.drain_timer.start(self.settings['event_drain_interval_ms'])
+            self.drain_events()
+
+    def drain_events(self):
+        events = self.event_buffer.drain()
+        if self.event_buffer.dropped != self.reported_dropped:
+            print(f"警告：事件缓冲区已满，累计丢弃 {self.event_buffer.dropped} 个按键事件")
+            self.reported_dropped = self.event_buffer.dropped
+        if not events:
+            self.emit_stats(time.time())
+            if not self.pending_stats and not self.pending_releases:
+                self.drain_timer.stop()
+            return
+        self.pending_keys = None
+        self.pending_key_time = None
+        for timestamp, pressed, key in events:
+            if pressed:
+                self.handle_press(timestamp, key)
+            else:
+                self.handle_release(timestamp, key)
+        # 一批事件只刷新一次悬浮窗，中间状态反正会被覆盖
+        if self.pending_keys is not None:
+            PROBE.mark_hook(self.pending_key_time)
+            self.key_event.emit(self.pending_keys)
+            self.clear_timer.start(1500)
+        self.emit_stats(time.time())
+
+    def emit_stats(self, now, force=False):
+        if not self.pending_stats and not self.pending_releases:
+            return
+        first_time = min(events[0][0] for events in (self.pending_stats, self.pending_releases) if events)
+        if force or (now - first_time) * 1000 >= self.settings['stats_batch_window_ms']:
+            batch, releases = self.pending_stats, self.pending_releases
+            self.pending_stats = []
+            self.pending_releases = []
+            self.keys_for_stats.emit(batch, releases)
+
+    def get_buffer_stats(self):
+        return self.event_buffer.get_stats()
+
+    def handle_press(self, current_time, key):
+        key_info = self.key_table.lookup(key)
+        key_char = key_info.name
 
         if current_time - self.last_key_time > 1.5:
             self.clear_display()
 
         self.last_key_time = current_time
+        self.pending_key_time = current_time
 
-        if key_char in {'ctrl', 'alt', 'shift', 'win', 'fn'}:
-            if key_char not in self.modifier_keys:
-                self.modifier_keys.add(key_char)
+        modifier_mask = self.modifier_mask
+        if key_info.category & CATEGORY_MODIFIER:
+            bit = MODIFIER_BITS[key_char]
+            if not modifier_mask & bit:
+                self.modifier_mask |= bit
                 self.emit_current_keys()
+            # 修饰键本身不算组合键
+            modifier_mask = 0
         else:
-            if not self.modifier_keys:
-                self.current_phrase += key_char
-                if len(self.current_phrase) > self.max_consecutive_chars:
-                    self.current_phrase = self.current_phrase[-self.max_consecutive_chars:]
-                key_string = self.current_phrase
+            if key_char == self.repeat_key and key_char in self.held_keys:
+                # 未松开又收到按下，是系统自动重复：不追加到短语，只累加次数
+                self.repeat_count += 1
+                keys = self.repeat_base + [f" ×{self.repeat_count}"]
             else:
-                key_string = "+".join(sorted(self.modifier_keys)) + "+" + key_char
+                if not modifier_mask:
+                    # 短语按按键保存，显示时逐个按键翻译，不会把 "salt" 里的 "alt" 当成按键名
+                    self.current_phrase.append(key_char)
+                    if len(self.current_phrase) > self.max_consecutive_chars:
+                        del self.current_phrase[:-self.max_consecutive_chars]
+                    keys = list(self.current_phrase)
+                else:
+                    keys = [MODIFIER_PREFIXES[modifier_mask] + "+" + key_char]
+                self.repeat_key = key_char
+                self.repeat_base = keys
+                self.repeat_count = 1
+            self.held_keys.add(key_char)
             
-            print(f"发送键字符串: {key_string}")  # 调试信息
-            self.key_event.emit(key_string)
+            self.pending_keys = keys
         
-        # 总是发送统计事件
-        self.key_for_stats.emit(key_char)
+        # 总是记录统计事件
+        self.pending_stats.append((current_time, key_char, modifier_mask))
 
         # 重置计时器
         self.clear_timer.start(1500)
 
-        self.key_for_stats.emit(key_char)
-
-    def on_release(self, key):
+    def handle_release(self, current_time, key):
         key_char = self.normalize_key(key)
-        print(f"Released key: {key_char}")  # 调试信息
-
-        if key_char in self.modifier_keys:
-            self.modifier_keys.remove(key_char)
-            if self.modifier_keys:
+        self.pending_releases.append((current_time, key_char))
+        self.held_keys.discard(key_char)
+        if key_char == self.repeat_key:
+            self.repeat_key = None
+
+        bit = MODIFIER_BITS.get(key_char, 0)
+        if self.modifier_mask & bit:
+            self.modifier_mask &= ~bit
+            if self.modifier_mask:
                 self.emit_current_keys()
             else:
                 # 如果所有修饰键都已释放，立即清除显示
@@ -97,76 +204,42 @@ class KeyboardListener(QObject):
 
     def clear_display(self):
         self.clear_event.emit()
-        self.current_phrase = ""
-        self.modifier_keys.clear()
+        self.current_phrase = []
+        self.modifier_mask = 0
+        self.pending_keys = None
+        # 丢失的释放事件不会让之后的按键被误判为自动重复
+        self.held_keys.clear()
+        self.repeat_key = None
 
     def emit_current_keys(self):
-        if self.modifier_keys:
-            key_string = "+".join(sorted(self.modifier_keys))
-            print(f"发送当前修饰键: {key_string}")  # 调试信息
-            self.key_event.emit(key_string)
+        if self.modifier_mask:
+            self.pending_keys = [MODIFIER_PREFIXES[self.modifier_mask]]
             # 重置计时器
             self.clear_timer.start(1500)
 
     def normalize_key(self, key):
-        if isinstance(key, keyboard.Key):
-            if key in {keyboard.Key.ctrl_l, keyboard.Key.ctrl_r}:
-                return 'ctrl'
-            elif key in {keyboard.Key.alt_l, keyboard.Key.alt_r}:
-                return 'alt'
-            elif key in {keyboard.Key.shift_l, keyboard.Key.shift_r}:
-                return 'shift'
-            elif key in {keyboard.Key.cmd, keyboard.Key.cmd_l, keyboard.Key.cmd_r}:
-                return 'win'
-            elif key == keyboard.Key.space:
-                return 'space'
-            return key.name.lower()
-        elif isinstance(key, keyboard.KeyCode):
-            if key.vk == self.settings['fn_key_code']:
-                return 'fn'
-            return self.vk_to_char(key.vk if key.vk else ord(key.char))
-        return str(key).lower()
+        return self.key_table.lookup(key).name
 
     def should_display_key(self, key):
-        if key in {'ctrl', 'alt', 'shift', 'win', 'fn'}:
-            return self.display_settings.get("display_顯示修飾鍵", True)
-        elif key.startswith('f') and key[1:].isdigit():
-            return self.display_settings.get("display_顯示F1~F12", True)
-        elif key in {'0', '1', '2', '3', '4', '5', '6', '7', '8', '9', '+', '-', '*', '/', 'enter', 'num_lock'}:
-            return self.display_settings.get("display_顯示小鍵盤", True)
-        else:
-            return self.display_settings.get("display_顯示普通鍵", True)
+        return bool(self.key_table.category(key) & self.display_mask)
 
     def start(self):
-        if not self.listener:
-            self.listener = keyboard.Listener(on_press=self.on_press, on_release=self.on_release)
-            self.listener.start()
+        if not self.listening:
+            self.input_source.start(self.on_press, self.on_release)
+            self.listening = True
+            self.drain_timer.start(self.settings['event_drain_interval_ms'])
         print("开始监听键盘")
 
     def stop(self):
-        if self.listener:
-            self.listener.stop()
-            self.listener = None
-        self.modifier_keys.clear()
-        self.current_phrase = ""
+        if self.listening:
+            self.input_source.stop()
+            self.listening = False
+            self.drain_timer.stop()
+            self.drain_events()
+            self.emit_stats(time.time(), force=True)
+        self.modifier_mask = 0
+        self.current_phrase = []
         print("停止监听键盘")
 
     def vk_to_char(self, vk):
-        vk_mapping = {
-            # 字母键
-            65: 'a', 66: 'b', 67: 'c', 68: 'd', 69: 'e', 70: 'f', 71: 'g', 72: 'h',
-            73: 'i', 74: 'j', 75: 'k', 76: 'l', 77: 'm', 78: 'n', 79: 'o', 80: 'p',
-            81: 'q', 82: 'r', 83: 's', 84: 't', 85: 'u', 86: 'v', 87: 'w', 88: 'x',
-            89: 'y', 90: 'z',
-            # 数字键
-            48: '0', 49: '1', 50: '2', 51: '3', 52: '4', 53: '5', 54: '6', 55: '7', 56: '8', 57: '9',
-            # 常用标点符号
-            186: ';', 187: '=', 188: ',', 189: '-', 190: '.', 191: '/', 192: '`',
-            219: '[', 220: '\\', 221: ']', 222: "'",
-            # 功能键
-            8: 'backspace', 9: 'tab', 13: 'enter', 16: 'shift', 17: 'ctrl', 18: 'alt',
-            19: 'pause', 20: 'caps_lock', 27: 'esc', 32: 'space', 33: 'page_up',
-            34: 'page_down', 35: 'end', 36: 'home', 37: 'left', 38: 'up', 39: 'right',
-            40: 'down', 45: 'insert', 46: 'delete',
-        }
-        return vk_mapping.get(vk, f'special_{vk}')
+        return self.key_table.lookup_vk(vk).name
@@ -0,0 +1,108 @@
+import json
+import time
+
+# 直方图桶上界（微秒），最后一个桶收集所有更慢的样本
+LATENCY_BUCKETS_US = [100, 250, 500, 1000, 2000, 4000, 8000, 16000, 33000, 66000, 125000, 250000, 500000]
+
+
+class LatencyHistogram:
+    def __init__(self, bounds=LATENCY_BUCKETS_US):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.total = 0
+        self.sum_us = 0
+        self.max_us = 0
+
+    def record(self, seconds):
+        us = int(seconds * 1000000)
+        index = 0
+        for bound in self.bounds:
+            if us <= bound:
+                break
+            index += 1
+        self.counts[index] += 1
+        self.total += 1
+        self.sum_us += us
+        self.max_us = max(self.max_us, us)
+
+    def percentile(self, p):
+        # 返回包含该分位的桶上界
+        if not self.total:
+            return 0
+        target = self.total * p / 100
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= target:
+                return min(self.bounds[index], self.max_us) if index < len(self.bounds) else self.max_us
+        return self.max_us
+
+    def summary(self):
+        return {
+            'count': self.total,
+            'mean_us': self.sum_us // self.total if self.total else 0,
+            'p50_us': self.percentile(50),
+            'p90_us': self.percentile(90),
+            'p99_us': self.percentile(99),
+            'max_us': self.max_us,
+            'buckets_us': self.bounds,
+            'counts': self.counts,
+        }
+
+
+class LatencyProbe:
+    # 按键到像素的分段延迟：钩子 -> 悬浮窗收到信号 -> 下一次绘制
+    STAGES = {
+        'hook_to_delivery': "钩子 → 信号送达",
+        'delivery_to_paint': "信号送达 → 绘制",
+        'hook_to_paint': "钩子 → 绘制",
+    }
+
+    def __init__(self):
+        self.histograms = {stage: LatencyHistogram() for stage in self.STAGES}
+        self.hook_time = None
+        self.delivered_time = None
+        self.delivered_hook_time = None
+
+    def mark_hook(self, timestamp):
+        self.hook_time = timestamp
+
+    def mark_delivered(self):
+        if self.hook_time is None:
+            return
+        now = time.time()
+        self.histograms['hook_to_delivery'].record(now - self.hook_time)
+        self.delivered_time = now
+        self.delivered_hook_time = self.hook_time
+        self.hook_time = None
+
+    def mark_painted(self):
+        if self.delivered_time is None:
+            return
+        now = time.time()
+        self.histograms['delivery_to_paint'].record(now - self.delivered_time)
+        self.histograms['hook_to_paint'].record(now - self.delivered_hook_time)
+        self.delivered_time = None
+        self.delivered_hook_time = None
+
+    def reset(self):
+        self.__init__()
+
+    def get_summary(self):
+        return {stage: histogram.summary() for stage, histogram in self.histograms.items()}
+
+    def format_report(self):
+        lines = []
+        for stage, label in self.STAGES.items():
+            summary = self.histograms[stage].summary()
+            lines.append(f"{label}: {summary['count']} 次，平均 {summary['mean_us'] / 1000:.2f} ms，"
+                         f"P50 ≤ {summary['p50_us'] / 1000:.2f} ms，P99 ≤ {summary['p99_us'] / 1000:.2f} ms，"
+                         f"最大 {summary['max_us'] / 1000:.2f} ms")
+        return "\n".join(lines)
+
+    def dump(self, file_path):
+        with open(file_path, 'w', encoding='utf-8') as f:
+            json.dump(self.get_summary(), f, indent=2)
+
+
+PROBE = LatencyProbe()
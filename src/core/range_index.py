@@ -0,0 +1,152 @@
+from array import array
+from datetime import date
+from .key_counter import VOCABULARY
+from .rollup import local_day_start, next_local_day
+
+
+class FenwickTree:
+    # 树状数组：单点累加和前缀和都是 O(log n)，下标从 0 开始，容量不足时按倍数扩容
+    def __init__(self, size=64):
+        self.tree = array('Q', bytes(8 * (size + 1)))
+
+    def __len__(self):
+        return len(self.tree) - 1
+
+    def add(self, index, n=1):
+        if index >= len(self):
+            self.grow(index + 1)
+        tree = self.tree
+        size = len(tree)
+        i = index + 1
+        while i < size:
+            tree[i] += n
+            i += i & -i
+
+    def prefix(self, index):
+        # [0, index) 的和
+        tree = self.tree
+        i = min(index, len(tree) - 1)
+        total = 0
+        while i > 0:
+            total += tree[i]
+            i -= i & -i
+        return total
+
+    def range_sum(self, start, end):
+        if start >= end:
+            return 0
+        return self.prefix(end) - self.prefix(max(start, 0))
+
+    def values(self):
+        return [self.range_sum(i, i + 1) for i in range(len(self))]
+
+    def grow(self, size):
+        self.rebuild(self.values(), max(size, 2 * len(self)))
+
+    def rebuild(self, values, size):
+        # O(n) 建树：每个节点把自己的和传给父节点
+        tree = array('Q', bytes(8 * (size + 1)))
+        tree[1:len(values) + 1] = array('Q', values)
+        for i in range(1, size + 1):
+            parent = i + (i & -i)
+            if parent <= size:
+                tree[parent] += tree[i]
+        self.tree = tree
+
+
+class DailyRangeIndex:
+    # 按本地日期分桶的逐键计数，每个按键一棵树状数组，另有一棵所有按键的合计；
+    # 任意日期区间、任意按键集合的次数都是每个按键 O(log n)
+    def __init__(self):
+        self.origin = None
+        self.trees = {}
+        self.totals = FenwickTree()
+        self.day_start = 0
+        self.day_end = 0
+        self.day_ordinal = 0
+
+    def ordinal_for(self, timestamp):
+        # 同一天的按键复用上次的计算结果，跨天才调用 localtime
+        if not self.day_start <= timestamp < self.day_end:
+            self.day_start = local_day_start(timestamp)
+            self.day_end = next_local_day(self.day_start)
+            self.day_ordinal = date.fromtimestamp(self.day_start).toordinal()
+        return self.day_ordinal
+
+    def add(self, key_id, timestamp, n=1):
+        self.add_ordinal(key_id, self.ordinal_for(timestamp), n)
+
+    def add_ordinal(self, key_id, ordinal, n=1):
+        if self.origin is None:
+            self.origin = ordinal
+        elif ordinal < self.origin:
+            self.shift_origin(ordinal)
+        index = ordinal - self.origin
+        tree = self.trees.get(key_id)
+        if tree is None:
+            tree = self.trees[key_id] = FenwickTree(max(64, len(self.totals)))
+        tree.add(index, n)
+        self.totals.add(index, n)
+
+    def shift_origin(self, ordinal):
+        # 导入了更早的数据，整体右移重建
+        offset = self.origin - ordinal
+        for tree in list(self.trees.values()) + [self.totals]:
+            values = [0] * offset + tree.values()
+            tree.rebuild(values, max(len(values), 64))
+        self.origin = ordinal
+
+    def count(self, start_date, end_date, keys=None):
+        # 闭区间 [start_date, end_date]；keys 为按键名列表，None 表示所有按键
+        if self.origin is None:
+            return 0
+        start = start_date.toordinal() - self.origin
+        end = end_date.toordinal() - self.origin + 1
+        if keys is None:
+            return self.totals.range_sum(start, end)
+        total = 0
+        for key in keys:
+            tree = self.trees.get(VOCABULARY.ids.get(key))
+            if tree is not None:
+                total += tree.range_sum(start, end)
+        return total
+
+    def counts_by_key(self, start_date, end_date):
+        if self.origin is None:
+            return {}
+        start = start_date.toordinal() - self.origin
+        end = end_date.toordinal() - self.origin + 1
+        names = VOCABULARY.names
+        counts = {}
+        for key_id, tree in self.trees.items():
+            count = tree.range_sum(start, end)
+            if count:
+                counts[names[key_id]] = count
+        return counts
+
+    def to_dict(self):
+        # 稀疏保存: {按键名: [[日期序数, 次数], ...]}
+        names = VOCABULARY.names
+        data = {}
+        for key_id, tree in self.trees.items():
+            data[names[key_id]] = [[self.origin + index, count]
+                                   for index, count in enumerate(tree.values()) if count]
+        return data
+
+    @classmethod
+    def from_dict(cls, data):
+        index = cls()
+        for key, days in (data or {}).items():
+            key_id = VOCABULARY.intern(key)
+            for ordinal, count in days:
+                index.add_ordinal(key_id, ordinal, count)
+        return index
+
+    @classmethod
+    def from_daily_rows(cls, rows):
+        # SQLite 日表的 (日期字符串, 按键, 次数)
+        index = cls()
+        for bucket, key, count in rows:
+            ordinal = date.fromisoformat(bucket).toordinal()
+            index.add_ordinal(VOCABULARY.intern(key), ordinal, count)
+        return index
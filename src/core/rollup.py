@@ -0,0 +1,99 @@
+import time
+
+DAY = 86400
+# 各粒度默认保留天数，None 表示永久保留；更粗的粒度始终同步累加，所以删除细粒度桶只损失精度
+DEFAULT_RETENTION_DAYS = {'minute': 7, 'hour': 365, 'day': None, 'month': None}
+
+
+def local_day_start(t):
+    local = time.localtime(t)
+    return int(time.mktime((local.tm_year, local.tm_mon, local.tm_mday, 0, 0, 0, 0, 0, -1)))
+
+
+def local_month_start(t):
+    local = time.localtime(t)
+    return int(time.mktime((local.tm_year, local.tm_mon, 1, 0, 0, 0, 0, 0, -1)))
+
+
+def next_local_day(start):
+    local = time.localtime(start)
+    return int(time.mktime((local.tm_year, local.tm_mon, local.tm_mday + 1, 0, 0, 0, 0, 0, -1)))
+
+
+def next_local_month(start):
+    local = time.localtime(start)
+    return int(time.mktime((local.tm_year, local.tm_mon + 1, 1, 0, 0, 0, 0, 0, -1)))
+
+
+class RollupLevel:
+    # 一种汇总粒度：对应的表、桶起点、下一个桶起点以及桶在表中的取值
+    def __init__(self, name, table, floor, next_start, bucket_key):
+        self.name = name
+        self.table = table
+        self.floor = floor
+        self.next_start = next_start
+        self.bucket_key = bucket_key
+
+    def ceil(self, t):
+        start = self.floor(t)
+        return start if start == t else self.next_start(start)
+
+
+# 分钟/小时桶用 UTC 时间戳（秒），日桶和月桶用本地日期字符串
+MINUTE = RollupLevel('minute', 'key_minutely', lambda t: t - t % 60, lambda t: t + 60, int)
+HOUR = RollupLevel('hour', 'key_hourly', lambda t: t - t % 3600, lambda t: t + 3600, int)
+DAY_LEVEL = RollupLevel('day', 'key_daily', local_day_start, next_local_day,
+                        lambda t: time.strftime('%Y-%m-%d', time.localtime(t)))
+MONTH = RollupLevel('month', 'key_monthly', local_month_start, next_local_month,
+                    lambda t: time.strftime('%Y-%m', time.localtime(t)))
+
+# 从粗到细
+ROLLUP_LEVELS = (MONTH, DAY_LEVEL, HOUR, MINUTE)
+
+
+class RetentionPolicy:
+    def __init__(self, retention_days=None):
+        self.retention_days = dict(DEFAULT_RETENTION_DAYS)
+        self.retention_days.update(retention_days or {})
+
+    def horizon(self, level, now):
+        # 该粒度最早仍保留的桶起点，永久保留时返回 None
+        days = self.retention_days.get(level.name)
+        if days is None:
+            return None
+        return level.floor(int(now) - days * DAY)
+
+    def expired(self, now):
+        expired = []
+        for level in ROLLUP_LEVELS:
+            horizon = self.horizon(level, now)
+            if horizon is not None:
+                expired.append((level, horizon))
+        return expired
+
+
+def plan_range(start, end, policy, now=None, levels=ROLLUP_LEVELS):
+    # 把 [start, end) 拆成尽量粗的整桶区间 [(level, 起点, 终点)]，首尾不足一个粗桶的部分交给更细的粒度；
+    # 细粒度已超出保留期时，边缘按包含它的粗桶整桶计入
+    now = time.time() if now is None else now
+    level = levels[0]
+    finer = levels[1:]
+    if not finer:
+        return [(level, level.floor(start), end)] if start < end else []
+    first = level.ceil(start)
+    last = level.floor(end)
+    if first >= last:
+        edges = [(start, end)]
+        plan = []
+    else:
+        edges = [(start, first), (last, end)]
+        plan = [(level, first, last)]
+    horizon = policy.horizon(finer[0], now)
+    for edge_start, edge_end in edges:
+        if edge_start >= edge_end:
+            continue
+        if horizon is not None and edge_start < horizon:
+            plan.append((level, level.floor(edge_start), level.ceil(edge_end)))
+        else:
+            plan.extend(plan_range(edge_start, edge_end, policy, now, finer))
+    return plan
@@ -0,0 +1,180 @@
+import os
+import sqlite3
+import time
+from collections import Counter
+from .rollup import ROLLUP_LEVELS, RetentionPolicy, plan_range
+
+ROLLUP_TABLES = tuple(level.table for level in ROLLUP_LEVELS)
+
+
+class SQLiteKeyStore:
+    def __init__(self, db_path, retention=None):
+        self.db_path = db_path
+        self.retention = retention or RetentionPolicy()
+        os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        self.conn = sqlite3.connect(db_path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.pending = []
+        self.create_tables()
+
+    def create_tables(self):
+        has_monthly = self.conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'key_monthly'").fetchone()
+        with self.conn:
+            # 分钟/小时桶用 UTC 时间戳（秒），日桶、月桶和一天中的小时用本地时间
+            for table in ('key_minutely', 'key_hourly'):
+                self.conn.execute(f"""
+                    CREATE TABLE IF NOT EXISTS {table} (
+                        user TEXT NOT NULL,
+                        bucket INTEGER NOT NULL,
+                        key TEXT NOT NULL,
+                        count INTEGER NOT NULL,
+                        PRIMARY KEY (user, bucket, key)
+                    ) WITHOUT ROWID
+                """)
+            for table in ('key_daily', 'key_monthly'):
+                self.conn.execute(f"""
+                    CREATE TABLE IF NOT EXISTS {table} (
+                        user TEXT NOT NULL,
+                        bucket TEXT NOT NULL,
+                        key TEXT NOT NULL,
+                        count INTEGER NOT NULL,
+                        PRIMARY KEY (user, bucket, key)
+                    ) WITHOUT ROWID
+                """)
+            if not has_monthly:
+                # 旧数据库没有月表，从日表补齐
+                self.conn.execute("""
+                    INSERT INTO key_monthly (user, bucket, key, count)
+                    SELECT user, substr(bucket, 1, 7), key, SUM(count) FROM key_daily
+                    GROUP BY user, substr(bucket, 1, 7), key
+                """)
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS key_hour_of_day (
+                    user TEXT NOT NULL,
+                    hour INTEGER NOT NULL,
+                    key TEXT NOT NULL,
+                    count INTEGER NOT NULL,
+                    PRIMARY KEY (user, hour, key)
+                ) WITHOUT ROWID
+            """)
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS key_totals (
+                    user TEXT NOT NULL,
+                    key TEXT NOT NULL,
+                    count INTEGER NOT NULL,
+                    PRIMARY KEY (user, key)
+                ) WITHOUT ROWID
+            """)
+
+    def record(self, username, key, timestamp):
+        self.pending.append((username, key, timestamp))
+
+    def flush(self):
+        if not self.pending:
+            return
+        minutely = Counter()
+        hourly = Counter()
+        daily = Counter()
+        monthly = Counter()
+        hour_of_day = Counter()
+        totals = Counter()
+        for username, key, timestamp in self.pending:
+            second = int(timestamp)
+            local = time.localtime(second)
+            minutely[(username, second - second % 60, key)] += 1
+            hourly[(username, second - second % 3600, key)] += 1
+            daily[(username, time.strftime('%Y-%m-%d', local), key)] += 1
+            monthly[(username, time.strftime('%Y-%m', local), key)] += 1
+            hour_of_day[(username, local.tm_hour, key)] += 1
+            totals[(username, key)] += 1
+        self.pending = []
+        with self.conn:
+            self.upsert('key_minutely', 'user, bucket, key', minutely)
+            self.upsert('key_hourly', 'user, bucket, key', hourly)
+            self.upsert('key_daily', 'user, bucket, key', daily)
+            self.upsert('key_monthly', 'user, bucket, key', monthly)
+            self.upsert('key_hour_of_day', 'user, hour, key', hour_of_day)
+            self.upsert('key_totals', 'user, key', totals)
+
+    def upsert(self, table, columns, counts):
+        placeholders = ', '.join('?' * (columns.count(',') + 2))
+        self.conn.executemany(f"""
+            INSERT INTO {table} ({columns}, count) VALUES ({placeholders})
+            ON CONFLICT ({columns}) DO UPDATE SET count = count + excluded.count
+        """, [(*bucket, count) for bucket, count in counts.items()])
+
+    def has_user(self, username):
+        self.flush()
+        row = self.conn.execute("SELECT 1 FROM key_totals WHERE user = ? LIMIT 1", (username,)).fetchone()
+        return row is not None
+
+    def load_totals(self, username):
+        self.flush()
+        rows = self.conn.execute("SELECT key, count FROM key_totals WHERE user = ?", (username,))
+        return dict(rows)
+
+    def set_totals(self, username, key_counts):
+        self.flush()
+        with self.conn:
+            self.conn.execute("DELETE FROM key_totals WHERE user = ?", (username,))
+            self.conn.executemany("INSERT INTO key_totals (user, key, count) VALUES (?, ?, ?)",
+                                  [(username, key, count) for key, count in key_counts.items()])
+
+    def delete_user(self, username):
+        self.pending = [event for event in self.pending if event[0] != username]
+        with self.conn:
+            for table in ROLLUP_TABLES + ('key_hour_of_day', 'key_totals'):
+                self.conn.execute(f"DELETE FROM {table} WHERE user = ?", (username,))
+
+    def apply_retention(self, usernames, now=None):
+        # 删除超出保留期的细粒度桶；更粗的桶在写入时已同步累加，不需要再做汇总
+        self.flush()
+        now = time.time() if now is None else now
+        deleted = 0
+        with self.conn:
+            for level, horizon in self.retention.expired(now):
+                for username in usernames:
+                    cursor = self.conn.execute(f"DELETE FROM {level.table} WHERE user = ? AND bucket < ?",
+                                               (username, level.bucket_key(horizon)))
+                    deleted += cursor.rowcount
+        return deleted
+
+    def get_range_stats(self, username, start, end):
+        # 中间部分用能覆盖的最粗粒度，首尾依次交给更细的粒度
+        self.flush()
+        counts = Counter()
+        for level, span_start, span_end in plan_range(int(start), int(end), self.retention):
+            counts.update(dict(self.conn.execute(f"""
+                SELECT key, SUM(count) FROM {level.table}
+                WHERE user = ? AND bucket >= ? AND bucket < ? GROUP BY key
+            """, (username, level.bucket_key(span_start), level.bucket_key(span_end)))))
+        return dict(counts)
+
+    def get_daily_rows(self, username):
+        self.flush()
+        return self.conn.execute("SELECT bucket, key, count FROM key_daily WHERE user = ?", (username,)).fetchall()
+
+    def get_daily_totals(self, username, days):
+        self.flush()
+        since = time.strftime('%Y-%m-%d', time.localtime(time.time() - (days - 1) * 86400))
+        rows = self.conn.execute("""
+            SELECT bucket, SUM(count) FROM key_daily
+            WHERE user = ? AND bucket >= ? GROUP BY bucket ORDER BY bucket
+        """, (username, since))
+        return list(rows)
+
+    def get_hour_of_day_totals(self, username):
+        self.flush()
+        totals = [0] * 24
+        rows = self.conn.execute("""
+            SELECT hour, SUM(count) FROM key_hour_of_day WHERE user = ? GROUP BY hour
+        """, (username,))
+        for hour, count in rows:
+            totals[hour] = count
+        return totals
+
+    def close(self):
+        self.flush()
+        self.conn.close()
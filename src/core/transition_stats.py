@@ -0,0 +1,153 @@
+from array import array
+from .key_counter import VOCABULARY
+from .typing_stats import PAUSE_THRESHOLD
+
+# 稠密二元组矩阵覆盖的词表 id 范围，超出部分交给 heavy hitter 跟踪
+DENSE_LIMIT = 128
+TOP_K = 256
+
+
+class SpaceSaving:
+    # Space-Saving top-K：最多保存 capacity 个条目，计数相同的条目放在同一个桶里，
+    # 每次更新和淘汰都是 O(1)
+    def __init__(self, capacity=TOP_K):
+        self.capacity = capacity
+        self.counts = {}
+        self.errors = {}
+        self.buckets = {}
+        self.min_count = 0
+
+    def add(self, item):
+        count = self.counts.get(item)
+        if count is not None:
+            self.move(item, count, count + 1)
+            return
+        if len(self.counts) < self.capacity:
+            self.counts[item] = 1
+            self.errors[item] = 0
+            self.buckets.setdefault(1, set()).add(item)
+            self.min_count = 1
+            return
+        # 淘汰计数最小的条目，新条目继承它的计数作为误差上界
+        victim = self.buckets[self.min_count].pop()
+        if not self.buckets[self.min_count]:
+            del self.buckets[self.min_count]
+        count = self.counts.pop(victim)
+        del self.errors[victim]
+        self.counts[item] = count + 1
+        self.errors[item] = count
+        self.buckets.setdefault(count + 1, set()).add(item)
+        if self.min_count not in self.buckets:
+            self.min_count = count + 1
+
+    def move(self, item, old, new):
+        bucket = self.buckets[old]
+        bucket.discard(item)
+        if not bucket:
+            del self.buckets[old]
+            if self.min_count == old:
+                self.min_count = new
+        self.counts[item] = new
+        self.buckets.setdefault(new, set()).add(item)
+
+    def top(self, n):
+        return sorted(self.counts.items(), key=lambda item: item[1], reverse=True)[:n]
+
+    def to_list(self, encode):
+        return [[encode(item), count, self.errors[item]] for item, count in self.counts.items()]
+
+    @classmethod
+    def from_list(cls, entries, decode, capacity=TOP_K):
+        tracker = cls(capacity)
+        entries = sorted(entries, key=lambda entry: entry[1], reverse=True)
+        for encoded, count, error in entries[:capacity]:
+            item = decode(encoded)
+            tracker.counts[item] = count
+            tracker.errors[item] = error
+            tracker.buckets.setdefault(count, set()).add(item)
+        if tracker.buckets:
+            tracker.min_count = min(tracker.buckets)
+        return tracker
+
+
+def encode_ids(ids):
+    return [VOCABULARY.names[key_id] for key_id in ids]
+
+
+def decode_names(names):
+    return tuple(VOCABULARY.intern(name) for name in names)
+
+
+class TransitionStats:
+    # 按键转移统计：稠密二元组矩阵 + 超出矩阵范围的二元组和三元组 top-K，内存有上限
+    def __init__(self):
+        self.matrix = array('I', bytes(4 * DENSE_LIMIT * DENSE_LIMIT))
+        self.sparse_bigrams = SpaceSaving()
+        self.trigrams = SpaceSaving()
+        self.previous = None
+        self.before_previous = None
+        self.last_time = None
+
+    def on_key(self, timestamp, key_id):
+        if self.last_time is None or timestamp - self.last_time > PAUSE_THRESHOLD:
+            # 长时间停顿后不再认为是连续输入
+            self.previous = None
+            self.before_previous = None
+        self.last_time = timestamp
+        previous = self.previous
+        if previous is not None:
+            if previous < DENSE_LIMIT and key_id < DENSE_LIMIT:
+                self.matrix[previous * DENSE_LIMIT + key_id] += 1
+            else:
+                self.sparse_bigrams.add((previous, key_id))
+            if self.before_previous is not None:
+                self.trigrams.add((self.before_previous, previous, key_id))
+        self.before_previous = previous
+        self.previous = key_id
+
+    def bigram_count(self, first, second):
+        first_id = VOCABULARY.ids.get(first)
+        second_id = VOCABULARY.ids.get(second)
+        if first_id is None or second_id is None:
+            return 0
+        if first_id < DENSE_LIMIT and second_id < DENSE_LIMIT:
+            return self.matrix[first_id * DENSE_LIMIT + second_id]
+        return self.sparse_bigrams.counts.get((first_id, second_id), 0)
+
+    def top_bigrams(self, n=20):
+        names = VOCABULARY.names
+        bigrams = [((names[index // DENSE_LIMIT], names[index % DENSE_LIMIT]), count)
+                   for index, count in enumerate(self.matrix) if count]
+        bigrams.extend((tuple(encode_ids(ids)), count) for ids, count in self.sparse_bigrams.counts.items())
+        return sorted(bigrams, key=lambda item: item[1], reverse=True)[:n]
+
+    def top_trigrams(self, n=20):
+        return [(tuple(encode_ids(ids)), count) for ids, count in self.trigrams.top(n)]
+
+    def to_dict(self):
+        names = VOCABULARY.names
+        bigrams = [[names[index // DENSE_LIMIT], names[index % DENSE_LIMIT], count]
+                   for index, count in enumerate(self.matrix) if count]
+        return {
+            'bigrams': bigrams,
+            'sparse_bigrams': self.sparse_bigrams.to_list(encode_ids),
+            'trigrams': self.trigrams.to_list(encode_ids),
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        stats = cls()
+        if not data:
+            return stats
+        # 持久化时用按键名，加载时重新映射到本次运行的词表 id
+        sparse_bigrams = list(data.get('sparse_bigrams', []))
+        for first, second, count in data.get('bigrams', []):
+            first_id = VOCABULARY.intern(first)
+            second_id = VOCABULARY.intern(second)
+            if first_id < DENSE_LIMIT and second_id < DENSE_LIMIT:
+                stats.matrix[first_id * DENSE_LIMIT + second_id] = count
+            else:
+                sparse_bigrams.append([[first, second], count, 0])
+        stats.sparse_bigrams = SpaceSaving.from_list(sparse_bigrams, decode_names)
+        stats.trigrams = SpaceSaving.from_list(data.get('trigrams', []), decode_names)
+        return stats
@@ -0,0 +1,180 @@
+import time
+
+QUANTILES = (0.5, 0.9, 0.99)
+# 超过该间隔视为停顿，不计入按键间隔分布
+PAUSE_THRESHOLD = 2.0
+MAX_DWELL = 5.0
+MAX_HELD_KEYS = 32
+WPM_WINDOW = 60
+CHARS_PER_WORD = 5
+
+
+class P2Quantile:
+    # P² 在线分位数估计（Jain & Chlamtac），只保存 5 个标记，内存恒定
+    def __init__(self, p):
+        self.p = p
+        self.heights = []
+        self.positions = [0, 1, 2, 3, 4]
+        self.desired = [0, 2 * p, 4 * p, 2 + 2 * p, 4]
+        self.increments = [0, p / 2, p, (1 + p) / 2, 1]
+
+    def add(self, x):
+        q = self.heights
+        if len(q) < 5:
+            q.append(x)
+            q.sort()
+            return
+        n = self.positions
+        if x < q[0]:
+            q[0] = x
+            k = 0
+        elif x >= q[4]:
+            q[4] = x
+            k = 3
+        else:
+            k = 0
+            while x >= q[k + 1]:
+                k += 1
+        for i in range(k + 1, 5):
+            n[i] += 1
+        for i in range(5):
+            self.desired[i] += self.increments[i]
+        for i in range(1, 4):
+            d = self.desired[i] - n[i]
+            if (d >= 1 and n[i + 1] - n[i] > 1) or (d <= -1 and n[i - 1] - n[i] < -1):
+                d = 1 if d > 0 else -1
+                height = self.parabolic(i, d)
+                if not q[i - 1] < height < q[i + 1]:
+                    height = q[i] + d * (q[i + d] - q[i]) / (n[i + d] - n[i])
+                q[i] = height
+                n[i] += d
+
+    def parabolic(self, i, d):
+        q = self.heights
+        n = self.positions
+        return q[i] + d / (n[i + 1] - n[i - 1]) * (
+            (n[i] - n[i - 1] + d) * (q[i + 1] - q[i]) / (n[i + 1] - n[i])
+            + (n[i + 1] - n[i] - d) * (q[i] - q[i - 1]) / (n[i] - n[i - 1]))
+
+    def value(self):
+        if not self.heights:
+            return 0.0
+        if len(self.heights) < 5:
+            return self.heights[round(self.p * (len(self.heights) - 1))]
+        return self.heights[2]
+
+    def to_dict(self):
+        return {'p': self.p, 'heights': self.heights, 'positions': self.positions, 'desired': self.desired}
+
+    @classmethod
+    def from_dict(cls, data):
+        estimator = cls(data['p'])
+        estimator.heights = data['heights']
+        estimator.positions = data['positions']
+        estimator.desired = data['desired']
+        return estimator
+
+
+class QuantileSketch:
+    def __init__(self):
+        self.estimators = [P2Quantile(p) for p in QUANTILES]
+        self.count = 0
+        self.total = 0.0
+
+    def add(self, x):
+        for estimator in self.estimators:
+            estimator.add(x)
+        self.count += 1
+        self.total += x
+
+    def summary(self):
+        summary = {'count': self.count, 'mean': self.total / self.count if self.count else 0.0}
+        for estimator in self.estimators:
+            summary[f'p{round(estimator.p * 100)}'] = estimator.value()
+        return summary
+
+    def to_dict(self):
+        return {'count': self.count, 'total': self.total,
+                'estimators': [estimator.to_dict() for estimator in self.estimators]}
+
+    @classmethod
+    def from_dict(cls, data):
+        sketch = cls()
+        sketch.count = data['count']
+        sketch.total = data['total']
+        sketch.estimators = [P2Quantile.from_dict(estimator) for estimator in data['estimators']]
+        return sketch
+
+
+class TypingDynamics:
+    # 按键间隔、按住时长的分位数与滚动 WPM，内存与打字时长无关
+    def __init__(self):
+        self.intervals = QuantileSketch()
+        self.dwell_times = QuantileSketch()
+        self.peak_wpm = 0.0
+        self.last_press_time = None
+        self.held = {}
+        self.wpm_seconds = [0] * WPM_WINDOW
+        self.wpm_counts = [0] * WPM_WINDOW
+
+    def on_press(self, timestamp, key):
+        # 返回 False 表示系统自动重复（按住未松开又收到按下），不计入间隔和 WPM
+        pressed_at = self.held.get(key)
+        if pressed_at is not None and 0 <= timestamp - pressed_at <= MAX_DWELL:
+            return False
+        if self.last_press_time is not None:
+            interval = timestamp - self.last_press_time
+            if 0 <= interval <= PAUSE_THRESHOLD:
+                self.intervals.add(interval)
+        self.last_press_time = timestamp
+        if pressed_at is None and len(self.held) >= MAX_HELD_KEYS:
+            # 丢失了释放事件的按键不再等待
+            self.held.clear()
+        # 按住超过 MAX_DWELL 的记录视为丢失了释放事件，按新的按下处理
+        self.held[key] = timestamp
+        if len(key) == 1 or key == 'space':
+            second = int(timestamp)
+            slot = second % WPM_WINDOW
+            if self.wpm_seconds[slot] != second:
+                self.wpm_seconds[slot] = second
+                self.wpm_counts[slot] = 0
+            self.wpm_counts[slot] += 1
+        return True
+
+    def on_release(self, timestamp, key):
+        pressed_at = self.held.pop(key, None)
+        if pressed_at is not None and 0 <= timestamp - pressed_at <= MAX_DWELL:
+            self.dwell_times.add(timestamp - pressed_at)
+
+    def current_wpm(self, now=None):
+        now = int(now if now is not None else time.time())
+        chars = sum(count for second, count in zip(self.wpm_seconds, self.wpm_counts)
+                    if now - WPM_WINDOW < second <= now)
+        return chars / CHARS_PER_WORD * 60 / WPM_WINDOW
+
+    def update_peak(self, now=None):
+        self.peak_wpm = max(self.peak_wpm, self.current_wpm(now))
+
+    def summary(self):
+        return {
+            'wpm': self.current_wpm(),
+            'peak_wpm': self.peak_wpm,
+            'interval': self.intervals.summary(),
+            'dwell': self.dwell_times.summary(),
+        }
+
+    def to_dict(self):
+        return {
+            'intervals': self.intervals.to_dict(),
+            'dwell_times': self.dwell_times.to_dict(),
+            'peak_wpm': self.peak_wpm,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        dynamics = cls()
+        if data:
+            dynamics.intervals = QuantileSketch.from_dict(data['intervals'])
+            dynamics.dwell_times = QuantileSketch.from_dict(data['dwell_times'])
+            dynamics.peak_wpm = data.get('peak_wpm', 0.0)
+        return dynamics
@@ -11,6 +11,7 @@ import json
 from datetime import datetime
 import os
 from ui.custom_menu import CustomMenu
+from ui.font_registry import FONTS
 
 
 class Keymira(QObject):
@@ -48,19 +49,17 @@ class Keymira(QObject):
         for font_file in ['NotoSansTC-Bold.ttf', 'NotoSansTC-Regular.ttf']:
             font_path = os.path.join(font_dir, font_file)
             if os.path.exists(font_path):
-                font_id = QFontDatabase.addApplicationFont(font_path)
-                if font_id != -1:
-                    font_families = QFontDatabase.applicationFontFamilies(font_id)
-                    if font_families:
-                        self.data_processor.add_font(font_families[0])
+                font_families = FONTS.register(font_path)
+                if font_families:
+                    self.data_processor.add_font(font_families[0])
             else:
                 print(f"警告：字体文件 {font_file} 不存在")
 
     def setup_connections(self):
         self.keyboard_listener.key_event.connect(self.floating_window.update_content)
         self.keyboard_listener.clear_event.connect(self.floating_window.clear_content)
-        self.keyboard_listener.key_for_stats.connect(self.on_key_for_stats)
-        self.app.aboutToQuit.connect(self.save_data)
+        self.keyboard_listener.keys_for_stats.connect(self.on_keys_for_stats)
+        self.app.aboutToQuit.connect(self.data_processor.close)
         self.main_window.import_data_signal.connect(self.data_processor.import_data)
         self.main_window.export_data_signal.connect(self.data_processor.export_data)
         self.main_window.add_user_signal.connect(self.add_user)
@@ -71,9 +70,10 @@ class Keymira(QObject):
         self.update_timer.timeout.connect(self.on_update_timer)
         self.update_timer.start(1000)
 
+        # 写回缓存的定时落盘，保证停止输入后数据也会在 flush_interval_ms 内写盘
         self.save_timer = QTimer(self)
         self.save_timer.timeout.connect(self.save_data)
-        self.save_timer.start(300000)
+        self.save_timer.start(self.data_processor.flush_interval_ms)
 
     def on_update_timer(self):
         self.update_stats_signal.emit()
@@ -82,17 +82,12 @@ class Keymira(QObject):
         if self.main_window:
             self.main_window.update_stats_display(self.data_processor.get_key_stats())
 
-    def on_key_for_stats(self, key):
-        self.data_processor.process_key(key)
+    def on_keys_for_stats(self, batch, releases):
+        self.data_processor.process_keys(batch, releases)
         self.update_stats_signal.emit()
 
     def save_data(self):
-        # 如果 self.stats 是一个包含两个元素的元组或列表
-        stats, additional_data = self.stats
-        self.data_processor.save_data(stats)
-        # 或者如果只需要保存 stats 中的第一个元素
-        # self.data_processor.save_data(self.stats[0])
-        print("数据已保存")
+        self.data_processor.flush()
 
     def clear_data(self):
         self.data_processor.clear_data()
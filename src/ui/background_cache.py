@@ -0,0 +1,36 @@
+from PyQt5.QtCore import Qt, QRectF
+from PyQt5.QtGui import QPixmap, QPainter, QBrush
+
+BACKGROUND_CACHE_SIZE = 32
+
+
+class BackgroundCache:
+    # 预先绘制好的半透明圆角背景，按 (尺寸, 颜色, 圆角, 设备像素比) 缓存；
+    # 窗口宽度已按档位取整，所以尺寸种类有限。样式或配色变化时调用 clear()
+    def __init__(self, capacity=BACKGROUND_CACHE_SIZE):
+        self.capacity = capacity
+        self.pixmaps = {}
+
+    def get(self, width, height, color, radius, ratio=1.0):
+        key = (width, height, color.rgba(), radius, ratio)
+        pixmap = self.pixmaps.get(key)
+        if pixmap is None:
+            if len(self.pixmaps) >= self.capacity:
+                self.pixmaps.clear()
+            pixmap = self.pixmaps[key] = self.render(width, height, color, radius, ratio)
+        return pixmap
+
+    def render(self, width, height, color, radius, ratio):
+        pixmap = QPixmap(int(width * ratio), int(height * ratio))
+        pixmap.setDevicePixelRatio(ratio)
+        pixmap.fill(Qt.transparent)
+        painter = QPainter(pixmap)
+        painter.setRenderHint(QPainter.Antialiasing)
+        painter.setBrush(QBrush(color))
+        painter.setPen(Qt.NoPen)
+        painter.drawRoundedRect(QRectF(0, 0, width, height), radius, radius)
+        painter.end()
+        return pixmap
+
+    def clear(self):
+        self.pixmaps.clear()
@@ -1,6 +1,7 @@
 from PyQt5.QtWidgets import QWidget, QVBoxLayout, QPushButton, QLabel, QGraphicsDropShadowEffect
 from PyQt5.QtCore import Qt, pyqtSignal, QSize, QRectF
 from PyQt5.QtGui import QFont, QColor, QPainter, QPainterPath, QLinearGradient
+from .font_registry import FONTS
 
 class CustomMenu(QWidget):
     setting_clicked = pyqtSignal()
@@ -23,7 +24,7 @@ class CustomMenu(QWidget):
 
         self.title = QPushButton("Keymira")
         self.title.setFixedSize(202, 76)
-        self.title.setFont(QFont("Noto Sans TC", 16, QFont.Bold))
+        self.title.setFont(FONTS.font("Noto Sans TC", 16, QFont.Bold))
         self.update_title_style()
         self.title.clicked.connect(self.toggle_listening_state)
         layout.addWidget(self.title)
@@ -38,7 +39,7 @@ class CustomMenu(QWidget):
         for i, (text, signal) in enumerate(buttons):
             btn = QPushButton(text)
             btn.setFixedSize(202, 76)
-            btn.setFont(QFont("Noto Sans TC", 20, QFont.Bold))
+            btn.setFont(FONTS.font("Noto Sans TC", 20, QFont.Bold))
             btn_style = """
                 QPushButton {
                     background-color: #EAEAEA;
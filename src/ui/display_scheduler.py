@@ -0,0 +1,42 @@
+import time
+from PyQt5.QtCore import QObject, QTimer, Qt
+
+DEFAULT_MAX_FPS = 60
+# 与 None 区分：None 表示清空显示
+NOTHING = object()
+
+
+class DisplayScheduler(QObject):
+    # 只保留最新一次待显示的内容，每个显示帧最多应用一次；空闲时第一条内容立即显示
+    def __init__(self, apply, max_fps=DEFAULT_MAX_FPS, parent=None):
+        super().__init__(parent)
+        self.apply = apply
+        self.pending = NOTHING
+        self.last_apply_time = 0.0
+        self.frame_interval = 1.0 / max_fps
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setTimerType(Qt.PreciseTimer)
+        self.timer.timeout.connect(self.flush)
+
+    def set_max_fps(self, max_fps):
+        self.frame_interval = 1.0 / max(1, max_fps)
+
+    def submit(self, content):
+        self.pending = content
+        if self.timer.isActive():
+            return
+        wait = self.last_apply_time + self.frame_interval - time.perf_counter()
+        if wait <= 0:
+            self.flush()
+        else:
+            self.timer.start(int(wait * 1000) + 1)
+
+    def flush(self):
+        self.timer.stop()
+        if self.pending is NOTHING:
+            return
+        content = self.pending
+        self.pending = NOTHING
+        self.last_apply_time = time.perf_counter()
+        self.apply(content)
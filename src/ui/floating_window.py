@@ -1,24 +1,37 @@
-from PyQt5.QtWidgets import QWidget, QLabel, QVBoxLayout
-from PyQt5.QtCore import Qt, QPoint, QTimer, QPropertyAnimation, QEasingCurve, QSize, QMetaObject
-from PyQt5.QtGui import QColor, QPainter, QFont, QFontMetrics, QMouseEvent, QPalette, QFontDatabase, QBrush
+from PyQt5.QtWidgets import QWidget
+from PyQt5.QtCore import Qt, QPoint, QPointF, QTimer, QPropertyAnimation, QEasingCurve, QSize, QMetaObject
+from PyQt5.QtGui import QColor, QPainter, QFont, QMouseEvent, QPalette, QFontDatabase, QBrush
+from core.latency_probe import PROBE
+from .key_display import KeyDisplayTranslator
+from .text_layout import TextLayoutCache, snap_width
+from .display_scheduler import DisplayScheduler, DEFAULT_MAX_FPS
+from .font_registry import FONTS
+from .background_cache import BackgroundCache
 
 class FloatingWindow(QWidget):
     def __init__(self, style_manager):
         super().__init__()
         self.style_manager = style_manager
-        self.current_style = self.style_manager.get_style("default_simple")
+        self.style_id = "default_simple"
+        self.current_style = self.style_manager.get_style(self.style_id)
+        # 按样式 id 缓存编译好的 key_display 转换器
+        self.translators = {}
         self.setWindowFlags(Qt.WindowStaysOnTopHint | Qt.FramelessWindowHint | Qt.Tool)
         self.setAttribute(Qt.WA_TranslucentBackground)
         self.setAttribute(Qt.WA_ShowWithoutActivating)
         
-        self.layout = QVBoxLayout()
-        self.label = QLabel()
-        self.label.setAlignment(Qt.AlignCenter)
-        self.layout.addWidget(self.label)
-        self.setLayout(self.layout)
+        # 文字直接在 paintEvent 里用 QStaticText 绘制，排版结果按 (字体, 文字) 缓存
+        self.text_layouts = TextLayoutCache()
+        self.text_layout = None
+        # 圆角背景预先绘制成 QPixmap，重绘时只需贴图
+        self.background_cache = BackgroundCache()
+        # 半透明磨砂玻璃效果
+        self.background_color = QColor(0, 0, 0, 180)
+        # 按键事件再多，每个显示帧也只刷新一次
+        self.display_scheduler = DisplayScheduler(self.apply_content, DEFAULT_MAX_FPS, self)
         
         self.settings = {}
-        self.font = QFont(self.current_style['font'], self.current_style['font_size'])
+        self.font = FONTS.font(self.current_style['font'], self.current_style['font_size'])
         self.min_width = 300  # 增加最小宽度
         self.max_width = 800  # 增加最大宽度
         self.padding = self.current_style['padding']
@@ -40,8 +53,11 @@ class FloatingWindow(QWidget):
 
     def update_settings(self, settings):
         self.settings = settings
-        style_name = settings.get('style', 'default_simple')
-        self.current_style = self.style_manager.get_style(style_name)
+        self.style_id = settings.get('style', 'default_simple')
+        self.current_style = self.style_manager.get_style(self.style_id)
+        # 样式可能已被修改或重新导入，重新编译
+        self.translators.clear()
+        self.display_scheduler.set_max_fps(settings.get('overlay_max_fps', DEFAULT_MAX_FPS))
         self.fade_in_duration = settings.get('fade_in', self.fade_in_duration)
         self.fade_out_duration = settings.get('fade_out', self.fade_out_duration)
         self.display_delay = settings.get('display_delay', self.display_delay)
@@ -56,40 +72,48 @@ class FloatingWindow(QWidget):
         palette.setColor(QPalette.Window, self.color)
         palette.setColor(QPalette.WindowText, self.text_color)
         self.setPalette(palette)
+        self.background_cache.clear()
         
         font_files = self.style_manager.get_style_font_files("default_simple")
         if font_files:
-            font_id = QFontDatabase.addApplicationFont(font_files[0])
-            if font_id != -1:
-                font_family = QFontDatabase.applicationFontFamilies(font_id)[0]
-                self.font = QFont(font_family, self.current_style['font_size'])
-        self.label.setFont(self.font)
-        self.label.setStyleSheet(f"color: {self.text_color.name()}; background-color: transparent;")
+            font_family = FONTS.family(font_files[0])
+            if font_family:
+                self.font = FONTS.font(font_family, self.current_style['font_size'])
+        if self.text_layout is not None:
+            self.text_layout = self.text_layouts.layout(self.font, self.text_layout.static_text.text())
+        self.adjust_size()
         self.update()
 
-    def update_content(self, text):
-        simplified_text = self.simplify_key_text(text)
-        self.label.setText(simplified_text)
-        self.adjust_size(simplified_text)
-        if not self.isVisible():
-            self.start_fade_in()
-        self.reset_activity_timer()
+    def update_content(self, keys):
+        # keys: KeyboardListener.key_event 发出的按键名列表
+        PROBE.mark_delivered()
+        self.display_scheduler.submit(keys)
 
     def clear_content(self):
-        self.label.clear()
-        self.adjust_size("")
+        self.display_scheduler.submit(None)
+
+    def apply_content(self, keys):
+        # 由显示调度器按帧调用，keys 为 None 表示清空
+        if keys is None:
+            self.text_layout = None
+        else:
+            self.text_layout = self.text_layouts.layout(self.font, self.simplify_key_text(keys))
+        self.adjust_size()
+        self.update()
+        if keys is not None and not self.isVisible():
+            self.start_fade_in()
         self.reset_activity_timer()
 
-    def adjust_size(self, text):
-        fm = QFontMetrics(self.font)
-        text_width = fm.horizontalAdvance(text)
-        text_height = fm.height()
-        
-        window_width = max(self.min_width, min(text_width + self.padding * 2, self.max_width))
+    def adjust_size(self):
+        # 宽度按档位取整，尺寸不变时不调用 setFixedSize，避免透明顶层窗口重新布局
+        text_width = self.text_layout.width if self.text_layout is not None else 0
+        text_height = self.text_layouts.line_height(self.font)
+
+        window_width = max(self.min_width, min(snap_width(text_width + self.padding * 2), self.max_width))
         window_height = text_height + self.padding * 2
-        
-        self.setFixedSize(window_width, window_height)
-        self.label.setFixedSize(window_width - self.padding * 2, window_height - self.padding * 2)
+
+        if window_width != self.width() or window_height != self.height():
+            self.setFixedSize(window_width, window_height)
 
     def start_fade_in(self):
         self.fade_animation.stop()
@@ -118,16 +142,17 @@ class FloatingWindow(QWidget):
         self.activity_timer.start(self.display_delay)
 
     def paintEvent(self, event):
+        PROBE.mark_painted()
         painter = QPainter(self)
-        painter.setRenderHint(QPainter.Antialiasing)
-
-        # 创建半透明磨砂玻璃效果
-        blur_color = QColor(0, 0, 0, 180)  # 黑色半透明
-        painter.setBrush(QBrush(blur_color))
-        painter.setPen(Qt.NoPen)
+        painter.drawPixmap(0, 0, self.background_cache.get(self.width(), self.height(), self.background_color,
+                                                           self.border_radius, self.devicePixelRatioF()))
 
-        # 绘制圆角矩形
-        painter.drawRoundedRect(self.rect(), self.border_radius, self.border_radius)
+        if self.text_layout is not None:
+            layout = self.text_layout
+            painter.setFont(self.font)
+            painter.setPen(self.text_color)
+            painter.drawStaticText(QPointF((self.width() - layout.width) / 2, (self.height() - layout.height) / 2),
+                                   layout.static_text)
 
     def mousePressEvent(self, event: QMouseEvent):
         if event.button() == Qt.LeftButton:
@@ -142,8 +167,8 @@ class FloatingWindow(QWidget):
         if event.button() == Qt.LeftButton:
             self.dragging = False
 
-    def simplify_key_text(self, text):
-        key_display = self.current_style['key_display']
-        for key, symbol in key_display.items():
-            text = text.replace(key, symbol)
-        return text
+    def simplify_key_text(self, keys):
+        translator = self.translators.get(self.style_id)
+        if translator is None:
+            translator = self.translators[self.style_id] = KeyDisplayTranslator(self.current_style['key_display'])
+        return translator.translate(keys)
@@ -0,0 +1,40 @@
+import os
+from PyQt5.QtCore import QByteArray
+from PyQt5.QtGui import QFont, QFontDatabase
+
+
+class FontRegistry:
+    # 进程内共享的字体注册表：每个字体文件只读取、注册一次，QFont 按 (字体族, 字号, 字重) 缓存
+    def __init__(self):
+        self.families_by_path = {}
+        self.fonts = {}
+
+    def register(self, path):
+        # 返回字体文件提供的字体族；文件不存在或加载失败时返回空列表（结果同样缓存）
+        path = os.path.realpath(path)
+        families = self.families_by_path.get(path)
+        if families is not None:
+            return families
+        families = []
+        if os.path.exists(path):
+            with open(path, 'rb') as f:
+                font_id = QFontDatabase.addApplicationFontFromData(QByteArray(f.read()))
+            if font_id != -1:
+                families = QFontDatabase.applicationFontFamilies(font_id)
+        self.families_by_path[path] = families
+        return families
+
+    def family(self, path):
+        families = self.register(path)
+        return families[0] if families else None
+
+    def font(self, family, size, weight=QFont.Normal):
+        # 返回副本，调用方修改字号等属性不会影响缓存；QFont 隐式共享，复制开销很小
+        key = (family, size, weight)
+        font = self.fonts.get(key)
+        if font is None:
+            font = self.fonts[key] = QFont(family, size, weight)
+        return QFont(font)
+
+
+FONTS = FontRegistry()
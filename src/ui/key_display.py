@@ -0,0 +1,18 @@
+class KeyDisplayTranslator:
+    # 样式 key_display 表编译一次，按按键逐项查表：
+    # 显示内容是按键名列表，组合键（如 'ctrl+s'）是其中一项，按 '+' 拆分后逐段查表；
+    # 不在表中的项（普通字符、自动重复的 " ×N" 后缀）原样保留
+    def __init__(self, key_display):
+        self.symbols = dict(key_display)
+
+    def translate(self, keys):
+        symbols = self.symbols
+        if not symbols:
+            return ''.join(keys)
+        return ''.join(self.translate_key(key) if len(key) > 1 and '+' in key else symbols.get(key, key)
+                       for key in keys)
+
+    def translate_key(self, key):
+        symbols = self.symbols
+        # 按 '+' 键本身会产生空段，原样保留
+        return '+'.join(symbols.get(token, token) for token in key.split('+'))
@@ -0,0 +1,127 @@
+import time
+from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex, QSortFilterProxyModel
+
+COLUMN_NAME, COLUMN_COUNT, COLUMN_PERCENT, COLUMN_RECENT = range(4)
+HEADERS = ["按键", "次数", "占比", "最近按下"]
+
+
+def iter_counts(counts):
+    # KeyCounter 直接遍历计数数组，其他映射按 items() 遍历
+    if hasattr(counts, 'as_array'):
+        names = counts.vocabulary.names
+        return ((names[key_id], count) for key_id, count in enumerate(counts.as_array()) if count)
+    return counts.items()
+
+
+class KeyStatsTableModel(QAbstractTableModel):
+    # 按键与组合键的计数表：刷新时只对计数变化的行发 dataChanged，新出现的按键追加到末尾；
+    # 排序交给 QSortFilterProxyModel（按 Qt.UserRole 的原始值排序）。
+    # 按键和组合键各自一组，占比按组内总数计算
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        # 每行: [名称, 次数, 最近一次计数增加的时间（未知为 0）, 组]
+        self.rows = []
+        self.row_index = {}
+        self.totals = []
+        self.primed = False
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(HEADERS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return HEADERS[section]
+        return None
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        name, count, last_seen, group = self.rows[index.row()]
+        column = index.column()
+        if role == Qt.DisplayRole:
+            if column == COLUMN_NAME:
+                return name
+            if column == COLUMN_COUNT:
+                return str(count)
+            if column == COLUMN_PERCENT:
+                total = self.totals[group]
+                return f"{count / total * 100:.2f}%" if total else "0.00%"
+            return time.strftime('%H:%M:%S', time.localtime(last_seen)) if last_seen else "-"
+        if role == Qt.UserRole:
+            if column == COLUMN_NAME:
+                return name
+            if column == COLUMN_RECENT:
+                return last_seen
+            if column == COLUMN_PERCENT:
+                # 按键和组合键的占比分母不同，按比例排序而不是按次数
+                total = self.totals[group]
+                return count / total if total else 0.0
+            return count
+        if role == Qt.TextAlignmentRole and column != COLUMN_NAME:
+            return int(Qt.AlignRight | Qt.AlignVCenter)
+        return None
+
+    def clear(self):
+        self.beginResetModel()
+        self.rows = []
+        self.row_index = {}
+        self.totals = []
+        self.primed = False
+        self.endResetModel()
+
+    def update_counts(self, *counts_list):
+        # 第一次填充时不知道各键最近何时按下，之后计数增加才记录时间
+        now = time.time() if self.primed else 0
+        self.primed = True
+        changed = []
+        added = []
+        totals = [0] * len(counts_list)
+        seen = 0
+        for group, counts in enumerate(counts_list):
+            for name, count in iter_counts(counts):
+                totals[group] += count
+                row = self.row_index.get(name)
+                if row is None:
+                    added.append([name, count, now, group])
+                    continue
+                seen += 1
+                entry = self.rows[row]
+                if count != entry[1]:
+                    if count < entry[1]:
+                        # 计数减少（导入数据等），整表重建
+                        self.clear()
+                        return self.update_counts(*counts_list)
+                    entry[1] = count
+                    entry[2] = now
+                    changed.append(row)
+        if seen < len(self.rows):
+            # 有按键消失（切换用户或清除数据），整表重建
+            self.clear()
+            return self.update_counts(*counts_list)
+        # 先更新总数再插入行：插入期间代理模型就会按占比排序新行
+        totals_changed = totals != self.totals
+        self.totals = totals
+        if added:
+            first = len(self.rows)
+            self.beginInsertRows(QModelIndex(), first, first + len(added) - 1)
+            for entry in added:
+                self.row_index[entry[0]] = len(self.rows)
+                self.rows.append(entry)
+            self.endInsertRows()
+        for row in changed:
+            self.dataChanged.emit(self.index(row, COLUMN_COUNT), self.index(row, COLUMN_RECENT))
+        if totals_changed:
+            # 总数变化后所有行的占比都变了，一个信号覆盖整列，视图只重绘可见部分
+            if self.rows:
+                self.dataChanged.emit(self.index(0, COLUMN_PERCENT), self.index(len(self.rows) - 1, COLUMN_PERCENT))
+
+
+class KeyStatsProxyModel(QSortFilterProxyModel):
+    def __init__(self, source, parent=None):
+        super().__init__(parent)
+        self.setSourceModel(source)
+        self.setSortRole(Qt.UserRole)
+        self.setDynamicSortFilter(True)
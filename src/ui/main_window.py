@@ -1,11 +1,17 @@
 from PyQt5.QtWidgets import (QMainWindow, QWidget, QVBoxLayout, QPushButton, 
-                             QHBoxLayout, QLabel, QSlider, QCheckBox, QColorDialog, QGridLayout, QSpacerItem, QStackedWidget, QComboBox, QDialog, QFrame, QFileDialog, QInputDialog, QMessageBox)
+                             QHBoxLayout, QLabel, QSlider, QCheckBox, QColorDialog, QGridLayout, QSpacerItem, QStackedWidget, QComboBox, QDialog, QFrame, QFileDialog, QInputDialog, QMessageBox,
+                             QTableView, QHeaderView, QAbstractItemView)
 from PyQt5.QtCore import Qt, QSize, pyqtSignal
 from PyQt5.QtGui import QFont, QColor, QPainter, QPainterPath, QIcon, QPixmap, QLinearGradient, QFontDatabase, QDesktopServices
 from PyQt5.QtCore import QUrl
 import os
+from core.latency_probe import PROBE
+from visualization.heatmap_generator import HeatmapGenerator
+from visualization.render_service import RenderService
 from .style_import_dialog import StyleImportDialog
 from .user_management_dialog import UserManagementDialog
+from .key_stats_model import KeyStatsTableModel, KeyStatsProxyModel, COLUMN_COUNT
+from .font_registry import FONTS
 
 class MainWindow(QMainWindow):
     import_data_signal = pyqtSignal(str)
@@ -49,7 +55,7 @@ class MainWindow(QMainWindow):
 
     def load_fonts(self):
         font_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'assets', 'NotoSansTC-Bold.otf')
-        QFontDatabase.addApplicationFont(font_path)
+        FONTS.register(font_path)
 
     def setup_ui(self):
         main_widget = QWidget()
@@ -124,7 +130,7 @@ class MainWindow(QMainWindow):
         title_bar_layout.addWidget(logo_label)
 
         title_label = QLabel("Keymira")
-        title_label.setFont(QFont("Noto Sans TC", 38, QFont.Bold))
+        title_label.setFont(FONTS.font("Noto Sans TC", 38, QFont.Bold))
         title_bar_layout.addWidget(title_label)
 
         title_bar_layout.addStretch()
@@ -316,6 +322,19 @@ class MainWindow(QMainWindow):
         import_style_button.clicked.connect(self.open_style_import_dialog)
         layout.addWidget(import_style_button, alignment=Qt.AlignRight)
 
+        # 按键延迟统计
+        latency_layout = QHBoxLayout()
+        latency_button = QPushButton("延迟统计")
+        latency_button.setFixedSize(120, 40)
+        latency_button.clicked.connect(self.show_latency_report)
+        latency_export_button = QPushButton("导出延迟")
+        latency_export_button.setFixedSize(120, 40)
+        latency_export_button.clicked.connect(self.export_latency_report)
+        latency_layout.addStretch()
+        latency_layout.addWidget(latency_button)
+        latency_layout.addWidget(latency_export_button)
+        layout.addLayout(latency_layout)
+
         # 添加链接
         links_layout = QHBoxLayout()
         
@@ -330,7 +349,7 @@ class MainWindow(QMainWindow):
         
         for link in [more_styles_link, about_link, user_manual_link]:
             link.setFlat(True)
-            link.setFont(QFont("Noto Sans TC Regular", 12))
+            link.setFont(FONTS.font("Noto Sans TC Regular", 12))
             link.setCursor(Qt.PointingHandCursor)
             links_layout.addWidget(link)
         
@@ -348,11 +367,11 @@ class MainWindow(QMainWindow):
         # 用户选择
         user_layout = QHBoxLayout()
         user_label = QLabel("用户")
-        user_label.setFont(QFont("Noto Sans TC Regular", 10))  # 减小字体
+        user_label.setFont(FONTS.font("Noto Sans TC Regular", 10))  # 减小字体
         user_layout.addWidget(user_label)
 
         self.user_combo = QComboBox()
-        self.user_combo.setFont(QFont("Noto Sans TC Regular", 9))  # 减小字体
+        self.user_combo.setFont(FONTS.font("Noto Sans TC Regular", 9))  # 减小字体
         self.user_combo.setFixedSize(300, 40)  # 保持原始大小
         self.user_combo.addItem("guest")
         self.update_user_list()
@@ -361,7 +380,7 @@ class MainWindow(QMainWindow):
 
         # 用户理钮
         user_management_button = QPushButton("用户管理")
-        user_management_button.setFont(QFont("Noto Sans TC Regular", 9))  # 减小字体
+        user_management_button.setFont(FONTS.font("Noto Sans TC Regular", 9))  # 减小字体
         user_management_button.setFixedSize(150, 40)  # 保持原始大小
         user_management_button.clicked.connect(self.open_user_management)
         user_layout.addWidget(user_management_button)
@@ -372,13 +391,14 @@ class MainWindow(QMainWindow):
         # 统计信息
         stats_layout = QHBoxLayout()
         stats_label = QLabel("统计信息")
-        stats_label.setFont(QFont("Noto Sans TC Regular", 10))  # 减小字体
+        stats_label.setFont(FONTS.font("Noto Sans TC Regular", 10))  # 减小字体
         stats_layout.addWidget(stats_label)
 
         self.stats_combo = QComboBox()
-        self.stats_combo.setFont(QFont("Noto Sans TC Regular", 9))
+        self.stats_combo.setFont(FONTS.font("Noto Sans TC Regular", 9))
         self.stats_combo.setFixedSize(300, 40)
         self.stats_combo.addItems(["热力图", "纯文字数据"])  # 只保留这两个选项
+        self.stats_combo.currentIndexChanged.connect(self.on_stats_type_changed)
         stats_layout.addWidget(self.stats_combo)
         stats_layout.addStretch()
 
@@ -388,6 +408,18 @@ class MainWindow(QMainWindow):
         chart_frame = QFrame()
         chart_frame.setFrameShape(QFrame.StyledPanel)
         chart_frame.setFixedSize(640, 360)  # 保持原始大小
+        chart_layout = QVBoxLayout(chart_frame)
+        chart_layout.setContentsMargins(0, 0, 0, 0)
+        self.chart_label = QLabel()
+        self.chart_label.setAlignment(Qt.AlignCenter)
+        chart_layout.addWidget(self.chart_label)
+        self.stats_model = KeyStatsTableModel(self)
+        self.stats_table = self.create_stats_table(self.stats_model)
+        self.stats_table.hide()
+        chart_layout.addWidget(self.stats_table)
+        self.heatmap_generator = HeatmapGenerator(640, 360)
+        self.render_service = RenderService(self)
+        self.render_service.finished.connect(self.on_render_finished)
         layout.addWidget(chart_frame, alignment=Qt.AlignCenter)
 
         # 按钮
@@ -395,7 +427,7 @@ class MainWindow(QMainWindow):
         import_button = QPushButton("历史信息导入")
         export_button = QPushButton("导出")
         for button in [import_button, export_button]:
-            button.setFont(QFont("Noto Sans TC Regular", 9))  # 减小字体
+            button.setFont(FONTS.font("Noto Sans TC Regular", 9))  # 减小字体
             button.setFixedSize(200, 40)  # 保持原始大小
         button_layout.addWidget(import_button)
         button_layout.addWidget(export_button)
@@ -479,13 +511,44 @@ class MainWindow(QMainWindow):
 
     def update_stats_display(self, stats):
         # 根据选择的统计类型（热力图或纯文字数据）更新显示
+        if not self.isVisible():
+            return
         selected_type = self.stats_combo.currentText()
         if selected_type == "热力图":
-            # 实现热力图显示逻辑
-            pass
+            self.render_service.submit('heatmap', self.render_heatmap, self.heatmap_generator.snapshot(stats))
         elif selected_type == "纯文字数据":
-            # 实现纯文字数据显示逻辑
-            pass
+            self.stats_model.update_counts(stats, self.data_processor.get_shortcut_stats())
+
+    def create_stats_table(self, model):
+        table = QTableView()
+        table.setModel(KeyStatsProxyModel(model, table))
+        table.setSortingEnabled(True)
+        table.sortByColumn(COLUMN_COUNT, Qt.DescendingOrder)
+        table.setFont(FONTS.font("Noto Sans TC Regular", 9))
+        table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        table.setAlternatingRowColors(True)
+        # 固定行高，滚动和刷新时不需要逐行计算尺寸
+        table.verticalHeader().hide()
+        table.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+        table.verticalHeader().setDefaultSectionSize(24)
+        table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        return table
+
+    def on_stats_type_changed(self, index):
+        heatmap = self.stats_combo.currentText() == "热力图"
+        self.chart_label.setVisible(heatmap)
+        self.stats_table.setVisible(not heatmap)
+        self.update_stats_display(self.data_processor.get_key_stats())
+
+    def render_heatmap(self, values):
+        # 在渲染线程执行；增量帧会被下一次渲染继续修改，所以交出副本
+        image = self.heatmap_generator.update(values)
+        return image.copy() if image is not None else None
+
+    def on_render_finished(self, key, image):
+        if key == 'heatmap' and self.stats_combo.currentText() == "热力图":
+            self.chart_label.setPixmap(QPixmap.fromImage(image))
 
     def create_combo_box(self, label_text, items):
         widget = QWidget()
@@ -495,14 +558,14 @@ class MainWindow(QMainWindow):
 
         label = QLabel(label_text)
         label.setAlignment(Qt.AlignLeft | Qt.AlignVCenter)
-        label.setFont(QFont("Noto Sans TC Regular", 12))
+        label.setFont(FONTS.font("Noto Sans TC Regular", 12))
         layout.addWidget(label)
 
         layout.addStretch()
 
         combo_box = QComboBox()
         combo_box.addItems(items)
-        combo_box.setFont(QFont("Noto Sans TC Regular", 12))
+        combo_box.setFont(FONTS.font("Noto Sans TC Regular", 12))
         combo_box.setFixedHeight(40)
         combo_box.setMinimumWidth(300)
         combo_box.setSizeAdjustPolicy(QComboBox.AdjustToContents)
@@ -548,6 +611,15 @@ class MainWindow(QMainWindow):
             # 这里可以添加处理导入样式的逻辑
             print("Imported style data:", style_data)
 
+    def show_latency_report(self):
+        QMessageBox.information(self, "延迟统计", PROBE.format_report())
+
+    def export_latency_report(self):
+        file_path, _ = QFileDialog.getSaveFileName(self, "导出延迟统计", "", "JSON Files (*.json)")
+        if file_path:
+            PROBE.dump(file_path)
+            QMessageBox.information(self, "成功", "延迟统计已导出")
+
     def import_data(self):
         file_path, _ = QFileDialog.getOpenFileName(self, "导入数据", "", "JSON Files (*.json)")
         if file_path:
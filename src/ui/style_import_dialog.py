@@ -4,6 +4,7 @@ from PyQt5.QtCore import Qt, QSize
 from PyQt5.QtGui import QIcon, QPixmap, QFont
 import os
 import shutil
+from .font_registry import FONTS
 
 class StyleImportDialog(QDialog):
     def __init__(self, parent=None):
@@ -33,7 +34,7 @@ class StyleImportDialog(QDialog):
         # 标题和关闭按钮
         title_layout = QHBoxLayout()
         title = QLabel("自定义样式")
-        title.setFont(QFont("Noto Sans TC Regular", 32, QFont.Bold))  # 增加字体大小
+        title.setFont(FONTS.font("Noto Sans TC Regular", 32, QFont.Bold))  # 增加字体大小
         title_layout.addWidget(title)
         title_layout.addStretch()
 
@@ -100,18 +101,18 @@ class StyleImportDialog(QDialog):
 
         label = QLabel(label_text)
         label.setFixedWidth(160)  # 增加标签宽度
-        label.setFont(QFont("Noto Sans TC Regular", 18))  # 增加字体大小
+        label.setFont(FONTS.font("Noto Sans TC Regular", 18))  # 增加字体大小
         layout.addWidget(label)
 
         line_edit = QLineEdit()
         line_edit.setFixedHeight(60)  # 增加输入框高度
-        line_edit.setFont(QFont("Noto Sans TC Regular", 16))  # 增加字体大小
+        line_edit.setFont(FONTS.font("Noto Sans TC Regular", 16))  # 增加字体大小
         layout.addWidget(line_edit)
 
         if is_file_input:
             browse_button = QPushButton("浏览")
             browse_button.setFixedSize(120, 60)  # 增加按钮大小
-            browse_button.setFont(QFont("Noto Sans TC Regular", 16))  # 增加字体大小
+            browse_button.setFont(FONTS.font("Noto Sans TC Regular", 16))  # 增加字体大小
             browse_button.clicked.connect(lambda: self.browse_file(line_edit))
             layout.addWidget(browse_button)
 
@@ -0,0 +1,49 @@
+import math
+from collections import OrderedDict
+from PyQt5.QtCore import Qt
+from PyQt5.QtGui import QStaticText, QTransform, QFontMetrics
+
+TEXT_CACHE_SIZE = 256
+# 悬浮窗宽度按该步长取整，连续输入时不会每个字符都改变窗口大小
+WIDTH_BUCKET = 48
+
+
+class TextLayout:
+    # 已排版的一段文字：QStaticText 复用字形布局，重绘时不再重新排版
+    def __init__(self, text, font):
+        self.static_text = QStaticText(text)
+        self.static_text.setTextFormat(Qt.PlainText)
+        self.static_text.prepare(QTransform(), font)
+        size = self.static_text.size()
+        self.width = math.ceil(size.width())
+        self.height = math.ceil(size.height())
+
+
+class TextLayoutCache:
+    # (字体, 文字) -> TextLayout 的 LRU 缓存，另外按字体缓存行高
+    def __init__(self, capacity=TEXT_CACHE_SIZE):
+        self.capacity = capacity
+        self.layouts = OrderedDict()
+        self.line_heights = {}
+
+    def layout(self, font, text):
+        key = (font.key(), text)
+        layout = self.layouts.get(key)
+        if layout is not None:
+            self.layouts.move_to_end(key)
+            return layout
+        layout = self.layouts[key] = TextLayout(text, font)
+        if len(self.layouts) > self.capacity:
+            self.layouts.popitem(last=False)
+        return layout
+
+    def line_height(self, font):
+        key = font.key()
+        height = self.line_heights.get(key)
+        if height is None:
+            height = self.line_heights[key] = QFontMetrics(font).height()
+        return height
+
+
+def snap_width(width, bucket=WIDTH_BUCKET):
+    return -(-width // bucket) * bucket
@@ -3,6 +3,7 @@ from PyQt5.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QLabel, QPushBut
 from PyQt5.QtCore import Qt, pyqtSignal
 from PyQt5.QtGui import QFont, QIcon, QPixmap
 import os
+from .font_registry import FONTS
 
 class UserManagementDialog(QDialog):
     user_added = pyqtSignal(str)
@@ -36,7 +37,7 @@ class UserManagementDialog(QDialog):
         # 标题和关闭按钮
         title_layout = QHBoxLayout()
         title = QLabel("用户管理")
-        title.setFont(QFont("Noto Sans TC Regular", 18, QFont.Bold))  # 调整字体大小
+        title.setFont(FONTS.font("Noto Sans TC Regular", 18, QFont.Bold))  # 调整字体大小
         title_layout.addWidget(title)
         title_layout.addStretch()
 
@@ -72,7 +73,7 @@ class UserManagementDialog(QDialog):
 
         # 用户列表
         self.user_list = QListWidget()
-        self.user_list.setFont(QFont("Noto Sans TC Regular", 10))  # 设置字体大小
+        self.user_list.setFont(FONTS.font("Noto Sans TC Regular", 10))  # 设置字体大小
         self.user_list.setStyleSheet("""
             QListWidget {
                 background-color: white;
@@ -85,7 +86,7 @@ class UserManagementDialog(QDialog):
 
         # 新用户输入
         self.new_user_input = QLineEdit()
-        self.new_user_input.setFont(QFont("Noto Sans TC Regular", 10))  # 设置字体大小
+        self.new_user_input.setFont(FONTS.font("Noto Sans TC Regular", 10))  # 设置字体大小
         self.new_user_input.setPlaceholderText("在此键入新用户")
         self.new_user_input.setStyleSheet("""
             QLineEdit {
@@ -103,7 +104,7 @@ class UserManagementDialog(QDialog):
         self.remove_button = QPushButton("-")
         for button in [self.add_button, self.remove_button]:
             button.setFixedSize(25, 25)  # 调整按钮大小
-            button.setFont(QFont("Noto Sans TC Regular", 12, QFont.Bold))  # 调整字体大小
+            button.setFont(FONTS.font("Noto Sans TC Regular", 12, QFont.Bold))  # 调整字体大小
         self.add_button.setStyleSheet("background-color: #4CAF50; color: white; border-radius: 12px;")
         self.remove_button.setStyleSheet("background-color: #F44336; color: white; border-radius: 12px;")
         button_layout.addStretch()
@@ -113,7 +114,7 @@ class UserManagementDialog(QDialog):
 
         # 确认按钮
         self.confirm_button = QPushButton("確認")
-        self.confirm_button.setFont(QFont("Noto Sans TC Regular", 10))  # 设置字体大小
+        self.confirm_button.setFont(FONTS.font("Noto Sans TC Regular", 10))  # 设置字体大小
         self.confirm_button.setFixedSize(80, 30)  # 调整按钮大小
         self.confirm_button.setStyleSheet("""
             QPushButton {
@@ -0,0 +1,196 @@
+import math
+import numpy as np
+from PyQt5.QtCore import Qt, QRect, QRectF
+from PyQt5.QtGui import QImage, QPainter, QColor, QFont
+from core.key_counter import VOCABULARY
+
+# 键盘布局（ANSI），每行 (按键名, 宽度)，按键名为 None 表示空隙；宽度以标准键宽为单位
+KEYBOARD_ROWS = [
+    [('esc', 1), (None, 1), ('f1', 1), ('f2', 1), ('f3', 1), ('f4', 1), (None, 0.5),
+     ('f5', 1), ('f6', 1), ('f7', 1), ('f8', 1), (None, 0.5),
+     ('f9', 1), ('f10', 1), ('f11', 1), ('f12', 1)],
+    [('`', 1), ('1', 1), ('2', 1), ('3', 1), ('4', 1), ('5', 1), ('6', 1), ('7', 1), ('8', 1),
+     ('9', 1), ('0', 1), ('-', 1), ('=', 1), ('backspace', 2), (None, 0.5),
+     ('insert', 1), ('home', 1), ('page_up', 1)],
+    [('tab', 1.5), ('q', 1), ('w', 1), ('e', 1), ('r', 1), ('t', 1), ('y', 1), ('u', 1), ('i', 1),
+     ('o', 1), ('p', 1), ('[', 1), (']', 1), ('\\', 1.5), (None, 0.5),
+     ('delete', 1), ('end', 1), ('page_down', 1)],
+    [('caps_lock', 1.75), ('a', 1), ('s', 1), ('d', 1), ('f', 1), ('g', 1), ('h', 1), ('j', 1),
+     ('k', 1), ('l', 1), (';', 1), ("'", 1), ('enter', 2.25)],
+    [('shift', 2.25), ('z', 1), ('x', 1), ('c', 1), ('v', 1), ('b', 1), ('n', 1), ('m', 1),
+     (',', 1), ('.', 1), ('/', 1), ('shift', 2.75), (None, 1.5), ('up', 1)],
+    [('ctrl', 1.25), ('win', 1.25), ('alt', 1.25), ('space', 6.25), ('alt', 1.25), ('fn', 1.25),
+     ('menu', 1.25), ('ctrl', 1.25), (None, 0.5), ('left', 1), ('down', 1), ('right', 1)],
+]
+# 功能键行与主键区之间的空隙
+ROW_GAPS = [0.5, 0, 0, 0, 0, 0]
+KEYBOARD_UNITS = (18.5, 6.5)
+
+KEY_LABELS = {
+    'esc': 'Esc', 'backspace': 'Back', 'tab': 'Tab', 'caps_lock': 'Caps', 'enter': 'Enter',
+    'shift': 'Shift', 'ctrl': 'Ctrl', 'win': 'Win', 'alt': 'Alt', 'fn': 'Fn', 'menu': 'Menu',
+    'space': 'Space', 'insert': 'Ins', 'home': 'Home', 'page_up': 'PgUp', 'delete': 'Del',
+    'end': 'End', 'page_down': 'PgDn', 'up': '↑', 'down': '↓', 'left': '←', 'right': '→',
+}
+
+BACKGROUND_COLOR = 0xFFFFFFFF
+ZERO_COLOR = 0xFFEDEDED
+# 调色板锚点：冷色 -> 暖色
+PALETTE_ANCHORS = [(0.0, (198, 219, 239)), (0.35, (107, 174, 214)), (0.6, (253, 208, 99)),
+                   (0.8, (253, 141, 60)), (1.0, (215, 48, 31))]
+PALETTE_SIZE = 256
+# 归一化上限取非零计数的该分位数，避免个别高频键（如空格）把其余键都压成冷色
+SCALE_PERCENTILE = 98
+# 增量更新时色标按该倍数分档，计数越过当前档位（或降到两档以下）才整体重算
+SCALE_GROWTH = 1.25
+
+
+def build_palette(size=PALETTE_SIZE):
+    positions = np.linspace(0.0, 1.0, size)
+    stops = np.array([stop for stop, _ in PALETTE_ANCHORS])
+    rgb = np.array([color for _, color in PALETTE_ANCHORS], dtype=np.float64)
+    channels = [np.interp(positions, stops, rgb[:, channel]).astype(np.uint32) for channel in range(3)]
+    palette = 0xFF000000 | (channels[0] << 16) | (channels[1] << 8) | channels[2]
+    palette[0] = ZERO_COLOR
+    return palette.astype(np.uint32)
+
+
+class HeatmapGenerator:
+    # 键盘热力图：布局几何、像素索引图和按键标签层只计算一次，每次渲染只做向量化的归一化、查色和一次像素映射；
+    # update() 在此基础上只重绘颜色档位变化的按键
+    def __init__(self, width=640, height=360):
+        self.width = width
+        self.height = height
+        self.palette = build_palette()
+        self.key_names = []
+        self.key_rects = []
+        self.rects_by_key = []
+        self.build_geometry()
+        self.index_map = self.build_index_map()
+        self.key_ids = np.full(len(self.key_names), -1, dtype=np.int64)
+        self.vocabulary_size = -1
+        self.label_font = QFont("Noto Sans TC Regular", max(6, int(self.unit * 0.22)))
+        self.label_layer = self.build_label_layer()
+        # 增量更新状态
+        self.frame = None
+        self.scale = 1.0
+        self.buckets = None
+
+    def build_geometry(self):
+        margin = 10
+        self.unit = min((self.width - 2 * margin) / KEYBOARD_UNITS[0],
+                        (self.height - 2 * margin) / KEYBOARD_UNITS[1])
+        left = (self.width - self.unit * KEYBOARD_UNITS[0]) / 2
+        y = (self.height - self.unit * KEYBOARD_UNITS[1]) / 2
+        key_index = {}
+        for row, gap in zip(KEYBOARD_ROWS, ROW_GAPS):
+            x = left
+            for name, width in row:
+                if name is not None:
+                    if name not in key_index:
+                        key_index[name] = len(self.key_names)
+                        self.key_names.append(name)
+                        self.rects_by_key.append([])
+                    # 键与键之间留 2 像素缝隙作为轮廓
+                    rect = (int(x) + 1, int(y) + 1, int(x + width * self.unit) - 1, int(y + self.unit) - 1)
+                    self.key_rects.append((key_index[name], rect))
+                    self.rects_by_key[key_index[name]].append(rect)
+                x += width * self.unit
+            y += self.unit * (1 + gap)
+
+    def build_index_map(self):
+        # 每个像素属于哪个按键，背景为 len(key_names)，对应颜色表最后一项
+        index_map = np.full((self.height, self.width), len(self.key_names), dtype=np.int16)
+        for key_index, (x0, y0, x1, y1) in self.key_rects:
+            index_map[y0:y1, x0:x1] = key_index
+        return index_map
+
+    def build_label_layer(self):
+        # 透明背景上只画标签，渲染时整体或按键局部叠加
+        layer = QImage(self.width, self.height, QImage.Format_ARGB32_Premultiplied)
+        layer.fill(Qt.transparent)
+        painter = QPainter(layer)
+        painter.setRenderHint(QPainter.TextAntialiasing)
+        painter.setFont(self.label_font)
+        painter.setPen(QColor("#333333"))
+        for key_index, (x0, y0, x1, y1) in self.key_rects:
+            name = self.key_names[key_index]
+            painter.drawText(QRectF(x0, y0, x1 - x0, y1 - y0), Qt.AlignCenter, KEY_LABELS.get(name, name.upper()))
+        painter.end()
+        return layer
+
+    def refresh_key_ids(self):
+        # 词表只增不减，大小变化时才重新查找布局按键的 id
+        if self.vocabulary_size != len(VOCABULARY):
+            self.key_ids = np.array([VOCABULARY.ids.get(name, -1) for name in self.key_names], dtype=np.int64)
+            self.vocabulary_size = len(VOCABULARY)
+
+    def key_values(self, counts):
+        # counts: KeyCounter（按词表 id 索引的计数数组）、{按键名: 次数} 或 snapshot() 的结果
+        if isinstance(counts, np.ndarray):
+            return counts
+        if hasattr(counts, 'as_array'):
+            self.refresh_key_ids()
+            array = np.frombuffer(counts.as_array(), dtype=np.uint64)
+            valid = (self.key_ids >= 0) & (self.key_ids < len(array))
+            values = np.zeros(len(self.key_names), dtype=np.float64)
+            values[valid] = array[self.key_ids[valid]]
+            return values
+        return np.array([counts.get(name, 0) for name in self.key_names], dtype=np.float64)
+
+    def snapshot(self, counts):
+        # 在界面线程取出布局按键的计数，交给渲染线程的只读副本
+        values = self.key_values(counts)
+        values.setflags(write=False)
+        return values
+
+    def scale_for(self, values):
+        nonzero = values[values > 0]
+        if not len(nonzero):
+            return 1.0
+        return max(float(np.percentile(nonzero, SCALE_PERCENTILE)), 1.0)
+
+    def buckets_for(self, values, scale):
+        # 对数归一化后映射到调色板下标，0 次单独占用下标 0
+        normalized = np.log1p(values) / np.log1p(scale)
+        buckets = 1 + np.clip(normalized, 0.0, 1.0) * (PALETTE_SIZE - 2)
+        buckets = buckets.astype(np.intp)
+        buckets[values <= 0] = 0
+        return buckets
+
+    def snapped_scale(self, scale):
+        return SCALE_GROWTH ** math.ceil(math.log(scale, SCALE_GROWTH)) if scale > 1 else 1.0
+
+    def update(self, counts):
+        # 增量渲染：返回更新后的帧，没有按键变色时返回 None
+        values = self.key_values(counts)
+        target = self.scale_for(values)
+        if self.frame is None or target > self.scale or target * SCALE_GROWTH ** 2 < self.scale:
+            self.scale = self.snapped_scale(target)
+            self.buckets = self.buckets_for(values, self.scale)
+            self.frame = self.paint_full(self.buckets)
+            return self.frame
+        buckets = self.buckets_for(values, self.scale)
+        changed = np.flatnonzero(buckets != self.buckets)
+        if not len(changed):
+            return None
+        self.buckets = buckets
+        colors = self.palette[buckets]
+        painter = QPainter(self.frame)
+        for key_index in changed:
+            color = QColor.fromRgba(int(colors[key_index]))
+            for x0, y0, x1, y1 in self.rects_by_key[key_index]:
+                rect = QRect(x0, y0, x1 - x0, y1 - y0)
+                painter.fillRect(rect, color)
+                painter.drawImage(rect, self.label_layer, rect)
+        painter.end()
+        return self.frame
+
+    def paint_full(self, buckets):
+        colors = np.append(self.palette[buckets], np.uint32(BACKGROUND_COLOR))
+        pixels = colors[self.index_map]
+        image = QImage(pixels.data, self.width, self.height, self.width * 4, QImage.Format_ARGB32).copy()
+        painter = QPainter(image)
+        painter.drawImage(0, 0, self.label_layer)
+        painter.end()
+        return image
@@ -0,0 +1,81 @@
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, QCoreApplication, Qt, pyqtSignal
+from PyQt5.QtGui import QImage
+
+
+class RenderTask(QRunnable):
+    def __init__(self, service, key, generation, render, args):
+        super().__init__()
+        self.service = service
+        self.key = key
+        self.generation = generation
+        self.render = render
+        self.args = args
+
+    def run(self):
+        # 排队期间已有更新的请求，直接放弃
+        if self.service.is_stale(self.key, self.generation):
+            return
+        image = self.render(*self.args)
+        if self.service.closed:
+            return
+        try:
+            # 渲染函数返回 None 表示与上一次结果相同，用空图通知
+            self.service.rendered.emit(self.key, self.generation, image if image is not None else QImage())
+        except RuntimeError:
+            # 服务已随窗口销毁（退出时渲染还没完成），结果直接丢弃
+            pass
+
+
+class RenderService(QObject):
+    # 在线程池里把不可变快照渲染成 QImage，结果通过排队信号回到界面线程。
+    # 同一 key 的新请求会让旧请求作废：未开始的直接跳过，已完成的结果先暂存，
+    # 只有最新请求报告"没有变化"时才交出暂存的结果。
+    # 线程池只有一个线程，渲染函数可以持有增量状态（如热力图的上一帧）而不需要加锁。
+    rendered = pyqtSignal(str, int, QImage)
+    finished = pyqtSignal(str, QImage)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(1)
+        self.generations = {}
+        self.held = {}
+        self.closed = False
+        self.rendered.connect(self.on_rendered, Qt.QueuedConnection)
+        app = QCoreApplication.instance()
+        if app is not None:
+            app.aboutToQuit.connect(self.shutdown)
+
+    def submit(self, key, render, *args):
+        # args 必须是快照，渲染线程运行期间界面线程不能再修改它们
+        if self.closed:
+            return
+        generation = self.generations.get(key, 0) + 1
+        self.generations[key] = generation
+        self.pool.start(RenderTask(self, key, generation, render, args))
+
+    def is_stale(self, key, generation):
+        return self.generations.get(key) != generation
+
+    def on_rendered(self, key, generation, image):
+        if self.is_stale(key, generation):
+            if not image.isNull():
+                self.held[key] = image
+            return
+        held = self.held.pop(key, None)
+        if image.isNull():
+            image = held
+        if image is not None:
+            self.finished.emit(key, image)
+
+    def wait(self, msecs=-1):
+        return self.pool.waitForDone(msecs)
+
+    def shutdown(self):
+        # 退出前作废所有请求：丢弃排队中的任务，等正在运行的任务结束，之后不再发出结果
+        self.closed = True
+        for key in self.generations:
+            self.generations[key] += 1
+        self.held.clear()
+        self.pool.clear()
+        self.pool.waitForDone()
@@ -0,0 +1,90 @@
+import os
+from datetime import date
+import pytest
+from core.data_processor import DataProcessor, KeyJournal, JOURNAL_RECORD
+
+BASE_TIME = 1700000000.0
+
+
+@pytest.fixture
+def data_dir(tmp_path, monkeypatch):
+    # DataProcessor 从当前目录读取 settings.json
+    monkeypatch.chdir(tmp_path)
+    return str(tmp_path / 'data')
+
+
+def open_processor(data_dir, username='alice'):
+    processor = DataProcessor(data_dir)
+    if username not in processor.users:
+        processor.add_user(username)
+    processor.set_current_user(username)
+    return processor
+
+
+def test_crash_after_checkpoint_replays_journal(data_dir):
+    processor = open_processor(data_dir)
+    processor.process_keys([(BASE_TIME, 'a', 0), (BASE_TIME + 1, 'b', 0)])
+    processor.save_data()
+    # 检查点之后的按键只在日志里，模拟崩溃：不保存直接重新打开
+    processor.process_keys([(BASE_TIME + 2, 's', 2), (BASE_TIME + 3, 'a', 0), (BASE_TIME + 4, 'ctrl+shift+z')])
+    processor.journal.flush()
+
+    reloaded = open_processor(data_dir)
+    counts = dict(reloaded.get_key_stats().items())
+    assert counts == {'a': 2, 'b': 1, 's': 1, 'ctrl': 1, 'shift': 1, 'z': 1}
+    assert dict(reloaded.get_top_shortcuts()) == {'ctrl+s': 1, 'ctrl+shift+z': 1}
+    assert reloaded.get_key_count_between(date.fromtimestamp(BASE_TIME), date.fromtimestamp(BASE_TIME + 5)) == 7
+
+
+def test_reload_does_not_replay_checkpointed_records_twice(data_dir):
+    processor = open_processor(data_dir)
+    processor.process_keys([(BASE_TIME, 'a', 0)])
+    processor.journal.flush()
+    processor.save_data()
+    processor.close()
+
+    reloaded = open_processor(data_dir)
+    assert dict(reloaded.get_key_stats().items()) == {'a': 1}
+
+
+def test_torn_trailing_record_is_truncated(tmp_path):
+    journal = KeyJournal(str(tmp_path))
+    for i, key in enumerate('abc'):
+        journal.append('alice', key, BASE_TIME + i)
+    journal.close()
+    path = journal.journal_path('alice')
+    with open(path, 'ab') as f:
+        f.write(JOURNAL_RECORD.pack(4, BASE_TIME + 3, b'd', 0)[:JOURNAL_RECORD.size // 2])
+
+    reopened = KeyJournal(str(tmp_path))
+    assert [key for _, key, _ in reopened.replay('alice', 0)] == ['a', 'b', 'c']
+    assert os.path.getsize(path) == 3 * JOURNAL_RECORD.size
+    # 截断后继续追加，序号接着最后一条完整记录
+    reopened.append('alice', 'e', BASE_TIME + 5)
+    reopened.close()
+    assert [key for _, key, _ in KeyJournal(str(tmp_path)).replay('alice', 3)] == ['e']
+
+
+def test_chord_mask_round_trips(tmp_path):
+    journal = KeyJournal(str(tmp_path))
+    journal.append('alice', 's', BASE_TIME, 2)
+    journal.append('alice', 'a', BASE_TIME + 1)
+    journal.close()
+    assert KeyJournal(str(tmp_path)).replay('alice', 0) == [(BASE_TIME, 's', 2), (BASE_TIME + 1, 'a', 0)]
+
+
+def test_compaction_keeps_records_appended_after_checkpoint(tmp_path):
+    journal = KeyJournal(str(tmp_path))
+    for i in range(5):
+        journal.append('alice', 'a', BASE_TIME + i)
+    seq, offset = journal.position('alice')
+    # 检查点写盘期间按键继续追加
+    for i in range(3):
+        journal.append('alice', 'b', BASE_TIME + 10 + i)
+    journal.compact('alice', offset)
+    journal.append('alice', 'c', BASE_TIME + 20)
+    journal.close()
+
+    assert journal.record_count('alice') == 4
+    replayed = KeyJournal(str(tmp_path)).replay('alice', seq)
+    assert [key for _, key, _ in replayed] == ['b', 'b', 'b', 'c']
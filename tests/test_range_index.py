@@ -0,0 +1,61 @@
+import random
+from datetime import date
+from core.key_counter import VOCABULARY
+from core.range_index import FenwickTree, DailyRangeIndex
+
+
+def test_fenwick_matches_naive_sums_across_growth():
+    rng = random.Random(1)
+    tree = FenwickTree(4)
+    values = [0] * 300
+    for _ in range(1000):
+        index = rng.randrange(len(values))
+        n = rng.randrange(1, 5)
+        tree.add(index, n)
+        values[index] += n
+    assert len(tree) >= len(values)
+    assert tree.values()[:len(values)] == values
+    for _ in range(200):
+        start = rng.randrange(len(values))
+        end = rng.randrange(start, len(values) + 1)
+        assert tree.range_sum(start, end) == sum(values[start:end])
+    assert tree.prefix(10 * len(tree)) == sum(values)
+    assert tree.range_sum(5, 5) == 0
+
+
+def test_daily_counts_by_date_range_and_key():
+    index = DailyRangeIndex()
+    a, b = VOCABULARY.intern('a'), VOCABULARY.intern('b')
+    day = date(2024, 3, 10).toordinal()
+    index.add_ordinal(a, day, 3)
+    index.add_ordinal(b, day + 1, 2)
+    index.add_ordinal(a, day + 40, 5)
+
+    first = date.fromordinal(day)
+    assert index.count(first, first) == 3
+    assert index.count(first, date.fromordinal(day + 1)) == 5
+    assert index.count(first, date.fromordinal(day + 40), ['a']) == 8
+    assert index.count(date.fromordinal(day + 2), date.fromordinal(day + 39)) == 0
+    assert index.counts_by_key(first, date.fromordinal(day + 1)) == {'a': 3, 'b': 2}
+
+
+def test_earlier_day_shifts_origin_without_losing_counts():
+    index = DailyRangeIndex()
+    a = VOCABULARY.intern('a')
+    day = date(2024, 3, 10).toordinal()
+    index.add_ordinal(a, day, 1)
+    index.add_ordinal(a, day - 100, 4)
+    assert index.origin == day - 100
+    assert index.count(date.fromordinal(day), date.fromordinal(day)) == 1
+    assert index.count(date.fromordinal(day - 100), date.fromordinal(day)) == 5
+
+
+def test_to_dict_round_trip():
+    index = DailyRangeIndex()
+    a, b = VOCABULARY.intern('a'), VOCABULARY.intern('b')
+    day = date(2024, 3, 10).toordinal()
+    index.add_ordinal(a, day, 2)
+    index.add_ordinal(b, day + 3, 1)
+    restored = DailyRangeIndex.from_dict(index.to_dict())
+    assert restored.to_dict() == index.to_dict()
+    assert restored.count(date.fromordinal(day), date.fromordinal(day + 3)) == 3
@@ -0,0 +1,50 @@
+import time
+from core.rollup import RetentionPolicy, plan_range, MONTH, DAY_LEVEL, HOUR, MINUTE
+
+
+def local_time(year, month, day, hour=0, minute=0):
+    return int(time.mktime((year, month, day, hour, minute, 0, 0, 0, -1)))
+
+
+def assert_contiguous(plan, start, end):
+    segments = sorted((segment_start, segment_end) for _, segment_start, segment_end in plan)
+    assert segments[0][0] == start
+    assert segments[-1][1] == end
+    for (_, previous_end), (next_start, _) in zip(segments, segments[1:]):
+        assert previous_end == next_start
+
+
+def test_plan_uses_coarsest_buckets_and_covers_range_exactly():
+    start = local_time(2024, 1, 30, 22, 15)
+    end = local_time(2024, 4, 2, 3, 7)
+    plan = plan_range(start, end, RetentionPolicy({'minute': None, 'hour': None}), now=end)
+    assert_contiguous(plan, start, end)
+    levels = [level for level, _, _ in plan]
+    assert levels.count(MONTH) == 1
+    assert (MONTH, local_time(2024, 2, 1), local_time(2024, 4, 1)) in plan
+    assert {DAY_LEVEL, HOUR, MINUTE} <= set(levels)
+
+
+def test_plan_aligned_range_is_a_single_bucket():
+    start = local_time(2024, 5, 1)
+    end = local_time(2024, 6, 1)
+    assert plan_range(start, end, RetentionPolicy(), now=end) == [(MONTH, start, end)]
+
+
+def test_plan_within_a_minute_uses_minute_level():
+    start = local_time(2024, 5, 1, 10, 5)
+    plan = plan_range(start, start + 60, RetentionPolicy(), now=start + 60)
+    assert plan == [(MINUTE, start, start + 60)]
+
+
+def test_edges_past_retention_fall_back_to_coarser_bucket():
+    # 分钟桶只保留 7 天，30 天前不在整点的起点按包含它的小时桶（UTC 整点）计入
+    now = local_time(2024, 6, 1, 12)
+    start = local_time(2024, 5, 2, 10, 20)
+    policy = RetentionPolicy({'minute': 7})
+    plan = plan_range(start, now, policy, now=now)
+    first_level, first_start, _ = min(plan, key=lambda segment: segment[1])
+    assert first_level is HOUR
+    assert first_start == HOUR.floor(start) < start
+    horizon = policy.horizon(MINUTE, now)
+    assert all(segment_start >= horizon for level, segment_start, _ in plan if level is MINUTE)